@@ -36,6 +36,7 @@ class MentorshipConfig:
     # Configurações de cache (se aplicável)
     DASHBOARD_CACHE_TIMEOUT = 300  # 5 minutos
     STATS_CACHE_TIMEOUT = 600  # 10 minutos
+    REFERENCE_DATA_CACHE_TIMEOUT = 3600  # 1 hora (especialidades e tags)
     
     # Configurações de notificações
     NOTIFY_COMPETENCY_COMPLETION = True
@@ -12,9 +12,10 @@ from sqlalchemy import (
     Boolean,
     Float,
     Enum,
-    Table
+    Table,
+    UniqueConstraint
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 import enum
 
@@ -60,6 +61,8 @@ case_specialties = Table(
 # entre Estagiários e Competências, com dados extras.
 class InternCompetency(Base):
     __tablename__ = 'intern_competency'
+    # Um vínculo por estagiário e competência (alvo do ON CONFLICT em create_study_plan)
+    __table_args__ = (UniqueConstraint('intern_id', 'competency_id'),)
     id = Column(Integer, primary_key=True)
     intern_id = Column(Integer, ForeignKey('intern.id'), nullable=False)
     competency_id = Column(Integer, ForeignKey('competency.id'), nullable=False)
@@ -92,7 +95,7 @@ class Intern(Base):
     average_grade = Column(Float, default=0.0)
     
     # Relacionamentos
-    competencies = relationship('InternCompetency', backref='intern', lazy='dynamic')
+    competencies = relationship('InternCompetency', backref='intern', lazy='select')
     case_analyses = relationship('CaseAnalysis', back_populates='intern')
     mentorship_sessions = relationship('MentorshipSession', back_populates='intern')
     study_plans = relationship('StudyPlan', back_populates='intern')
@@ -126,12 +129,13 @@ class EducationalCase(Base):
     specialty = Column(String(50))
     difficulty_level = Column(Enum(CaseDifficulty), default=CaseDifficulty.INTERMEDIARIO)
     patient_profile = Column(JSON) # Dados anonimizados
-    clinical_history = Column(Text)
-    physical_examination = Column(Text)
+    # Textos longos do caso: carregados apenas nos detalhes (grupo 'full_case')
+    clinical_history = deferred(Column(Text), group='full_case')
+    physical_examination = deferred(Column(Text), group='full_case')
     diagnosis = Column(String(200))
-    treatment_plan = Column(Text)
-    outcomes = Column(Text)
-    expected_outcomes = Column(Text)
+    treatment_plan = deferred(Column(Text), group='full_case')
+    outcomes = deferred(Column(Text), group='full_case')
+    expected_outcomes = deferred(Column(Text), group='full_case')
     learning_objectives = Column(JSON)
     estimated_time_minutes = Column(Integer, default=60)
     created_by_id = Column(Integer, ForeignKey('user.id'))
@@ -177,14 +181,17 @@ class EducationalResource(Base):
 class CaseAnalysis(Base):
     """Análises de casos feitas pelos estagiários"""
     __tablename__ = 'case_analysis'
+    # Uma análise por estagiário e caso (alvo do upsert em submit_case_analysis)
+    __table_args__ = (UniqueConstraint('intern_id', 'case_id'),)
     
     id = Column(Integer, primary_key=True)
     case_id = Column(Integer, ForeignKey('educational_case.id'), nullable=False)
     intern_id = Column(Integer, ForeignKey('intern.id'), nullable=False)
-    analysis_text = Column(Text, nullable=False)
-    diagnosis_attempt = Column(Text)
-    treatment_proposal = Column(Text)
-    mentor_feedback = Column(Text)
+    # Textos longos da análise (grupo 'full_analysis')
+    analysis_text = deferred(Column(Text, nullable=False), group='full_analysis')
+    diagnosis_attempt = deferred(Column(Text), group='full_analysis')
+    treatment_proposal = deferred(Column(Text), group='full_analysis')
+    mentor_feedback = deferred(Column(Text), group='full_analysis')
     grade = Column(Float) # Nota de 0 a 10
     time_spent_minutes = Column(Integer)
     is_completed = Column(Boolean, default=False)
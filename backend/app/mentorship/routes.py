@@ -1,15 +1,27 @@
 
-from flask import Blueprint, request, jsonify
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import func, desc, and_, or_
-from datetime import datetime, timedelta
+import csv
+import hashlib
+import io
+import time
+from flask import Blueprint, request, jsonify, Response, current_app, stream_with_context
+from sqlalchemy.orm import sessionmaker, load_only, selectinload, undefer_group
+from sqlalchemy import func, desc, and_, or_, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from psycopg2 import errorcodes
+from datetime import datetime
 from .models import (
     Intern, Competency, InternCompetency, EducationalCase, 
     EducationalResource, CaseAnalysis, Tag, Specialty, 
     MentorshipSession, StudyPlan, CompetencyStatus, 
     CaseDifficulty, ResourceType
 )
-from ..database import db
+from .config import MentorshipConfig
+from .utils import MentorshipUtils, ValidationError
+from .services import (
+    DASHBOARD_STATS_CACHE_KEY, COMPLETED_COMPETENCY_STATUSES, invalidate_dashboard_cache,
+    query_dashboard_stats, query_top_interns
+)
+from .. import db, cache
 
 mentorship_bp = Blueprint(
     'mentorship_bp',
@@ -17,69 +29,72 @@ mentorship_bp = Blueprint(
     url_prefix='/api/mentorship'
 )
 
+# Conversão de valores da requisição para enums. As chaves são str porque
+# query strings chegam como texto e o JSON pode trazer números
+COMPETENCY_STATUS_BY_VALUE = {str(member.value): member for member in CompetencyStatus}
+CASE_DIFFICULTY_BY_VALUE = {str(member.value): member for member in CaseDifficulty}
+RESOURCE_TYPE_BY_VALUE = {str(member.value): member for member in ResourceType}
+
+def _parse_enum(members_by_value, value, field):
+    """Converte um valor recebido para o membro do enum correspondente"""
+    try:
+        return members_by_value[str(value)]
+    except KeyError:
+        raise ValidationError(f'Valor inválido para {field}: {value}')
+
+# Dados de referência em cache (especialidades e tags), servidos com ETag
+SPECIALTIES_CACHE_KEY = 'mentorship:specialties'
+TAGS_CACHE_KEY = 'mentorship:tags'
+
+def _invalidate_reference_data(*cache_keys):
+    """Invalida dados de referência em cache após uma escrita"""
+    cache.delete_many(*cache_keys)
+
 # -- Dashboard Endpoints --
 @mentorship_bp.route('/dashboard-stats', methods=['GET'])
 def get_dashboard_stats():
     """Retorna métricas agregadas para o dashboard de mentoria"""
     try:
-        # Estatísticas gerais
-        total_interns = db.session.query(Intern).filter(Intern.is_active == True).count()
-        total_cases = db.session.query(EducationalCase).filter(EducationalCase.is_published == True).count()
-        total_resources = db.session.query(EducationalResource).count()
-        
-        # Estatísticas de progresso
-        completed_competencies = db.session.query(InternCompetency).filter(
-            InternCompetency.status == CompetencyStatus.COMPLETED
-        ).count()
-        
-        in_progress_competencies = db.session.query(InternCompetency).filter(
-            InternCompetency.status == CompetencyStatus.IN_PROGRESS
-        ).count()
-        
-        # Casos analisados no último mês
-        last_month = datetime.utcnow() - timedelta(days=30)
-        recent_case_analyses = db.session.query(CaseAnalysis).filter(
-            CaseAnalysis.completed_at >= last_month,
-            CaseAnalysis.is_completed == True
-        ).count()
-        
-        # Horas de estudo totais
-        total_study_hours = db.session.query(func.sum(Intern.total_hours)).scalar() or 0
-        
-        # Média de notas dos casos
-        avg_case_grade = db.session.query(func.avg(CaseAnalysis.grade)).filter(
-            CaseAnalysis.grade.isnot(None)
-        ).scalar() or 0
+        # O dashboard é consultado periodicamente pelo frontend; as métricas
+        # ficam em cache e são invalidadas quando os dados de origem mudam
+        cached_data = cache.get(DASHBOARD_STATS_CACHE_KEY)
+        if cached_data is not None:
+            return jsonify({
+                'success': True,
+                'data': cached_data
+            }), 200
+        
+        # Todas as métricas escalares em uma única ida ao banco
+        stats = query_dashboard_stats()
         
         # Top 5 estagiários por progresso
-        top_interns = db.session.query(
-            Intern.id, Intern.name, 
-            func.avg(InternCompetency.progress_percentage).label('avg_progress')
-        ).join(InternCompetency).group_by(Intern.id, Intern.name).order_by(
-            desc('avg_progress')
-        ).limit(5).all()
+        top_interns = query_top_interns()
+        
+        data = {
+            'overview': {
+                'total_interns': stats.total_interns,
+                'total_cases': stats.total_cases,
+                'total_resources': stats.total_resources,
+                'total_study_hours': float(stats.total_study_hours)
+            },
+            'progress': {
+                'completed_competencies': stats.completed_competencies,
+                'in_progress_competencies': stats.in_progress_competencies,
+                'recent_case_analyses': stats.recent_case_analyses,
+                'avg_case_grade': float(stats.avg_case_grade)
+            },
+            'top_interns': [{
+                'id': intern.id,
+                'name': intern.name,
+                'avg_progress': float(intern.avg_progress or 0)
+            } for intern in top_interns]
+        }
+        cache.set(DASHBOARD_STATS_CACHE_KEY, data,
+                  timeout=MentorshipConfig.DASHBOARD_CACHE_TIMEOUT)
         
         return jsonify({
             'success': True,
-            'data': {
-                'overview': {
-                    'total_interns': total_interns,
-                    'total_cases': total_cases,
-                    'total_resources': total_resources,
-                    'total_study_hours': float(total_study_hours)
-                },
-                'progress': {
-                    'completed_competencies': completed_competencies,
-                    'in_progress_competencies': in_progress_competencies,
-                    'recent_case_analyses': recent_case_analyses,
-                    'avg_case_grade': float(avg_case_grade)
-                },
-                'top_interns': [{
-                    'id': intern.id,
-                    'name': intern.name,
-                    'avg_progress': float(intern.avg_progress or 0)
-                } for intern in top_interns]
-            }
+            'data': data
         }), 200
         
     except Exception as e:
@@ -98,12 +113,20 @@ def get_interns():
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 20))
         
-        # Query base
-        query = db.session.query(Intern).filter(Intern.is_active == is_active)
+        # Query base (ordenada por nome, coberta por idx_interns_active_name)
+        # Carrega apenas as colunas exibidas na listagem
+        query = db.session.query(Intern).options(
+            load_only(
+                Intern.id, Intern.name, Intern.email, Intern.phone,
+                Intern.total_hours, Intern.completed_cases,
+                Intern.average_grade, Intern.created_at
+            )
+        ).filter(
+            Intern.is_active == is_active
+        ).order_by(Intern.name)
         
         # Paginação
-        interns = query.offset((page - 1) * per_page).limit(per_page).all()
-        total = query.count()
+        interns, total = MentorshipUtils.fetch_page(query, page, per_page)
         
         return jsonify({
             'success': True,
@@ -133,6 +156,17 @@ def get_interns():
             'error': str(e)
         }), 500
 
+# Restrição UNIQUE do email do estagiário (nome padrão do PostgreSQL para
+# o esquema do create_all e para o da migração 001)
+INTERN_EMAIL_CONSTRAINTS = frozenset({'intern_email_key', 'interns_email_key'})
+
+def _is_unique_violation(err, constraint_names):
+    """Indica se o IntegrityError é uma violação de UNIQUE em uma das restrições informadas"""
+    orig = err.orig
+    diag = getattr(orig, 'diag', None)
+    return (getattr(orig, 'pgcode', None) == errorcodes.UNIQUE_VIOLATION
+            and getattr(diag, 'constraint_name', None) in constraint_names)
+
 @mentorship_bp.route('/interns', methods=['POST'])
 def create_intern():
     """Cadastra um novo estagiário"""
@@ -148,17 +182,6 @@ def create_intern():
                     'error': f'Campo obrigatório: {field}'
                 }), 400
         
-        # Verificar se email já existe
-        existing_intern = db.session.query(Intern).filter(
-            Intern.email == data['email']
-        ).first()
-        
-        if existing_intern:
-            return jsonify({
-                'success': False,
-                'error': 'Email já cadastrado'
-            }), 400
-        
         # Criar novo estagiário
         intern = Intern(
             name=data['name'],
@@ -168,7 +191,21 @@ def create_intern():
         )
         
         db.session.add(intern)
-        db.session.commit()
+        
+        # Email duplicado é detectado pela restrição UNIQUE do banco;
+        # outras violações de integridade seguem para o tratamento genérico (500)
+        try:
+            db.session.commit()
+        except IntegrityError as err:
+            db.session.rollback()
+            if not _is_unique_violation(err, INTERN_EMAIL_CONSTRAINTS):
+                raise
+            return jsonify({
+                'success': False,
+                'error': 'Email já cadastrado'
+            }), 400
+        
+        invalidate_dashboard_cache()
         
         return jsonify({
             'success': True,
@@ -192,7 +229,7 @@ def create_intern():
 def get_intern_details(intern_id):
     """Detalhes de um estagiário, incluindo plano e progresso"""
     try:
-        intern = db.session.query(Intern).filter(Intern.id == intern_id).first()
+        intern = db.session.get(Intern, intern_id)
         
         if not intern:
             return jsonify({
@@ -200,9 +237,17 @@ def get_intern_details(intern_id):
                 'error': 'Estagiário não encontrado'
             }), 404
         
-        # Buscar competências e progresso
+        # Buscar competências e progresso (apenas as colunas exibidas;
+        # os valores padrão de progresso são resolvidos no banco)
         competencies = db.session.query(
-            Competency, InternCompetency
+            Competency.id, Competency.name, Competency.description,
+            Competency.required_hours, Competency.is_mandatory,
+            InternCompetency.id.label('intern_competency_id'),
+            InternCompetency.status,
+            func.coalesce(InternCompetency.progress_percentage, 0).label('progress_percentage'),
+            func.coalesce(InternCompetency.hours_completed, 0).label('hours_completed'),
+            InternCompetency.score.label('grade'), InternCompetency.mentor_feedback,
+            InternCompetency.started_at, InternCompetency.completed_at
         ).outerjoin(
             InternCompetency, 
             and_(InternCompetency.competency_id == Competency.id,
@@ -210,7 +255,10 @@ def get_intern_details(intern_id):
         ).order_by(Competency.order_index).all()
         
         # Buscar análises de casos recentes
-        recent_analyses = db.session.query(CaseAnalysis).filter(
+        recent_analyses = db.session.query(
+            CaseAnalysis.id, CaseAnalysis.case_id, CaseAnalysis.grade,
+            CaseAnalysis.is_completed, CaseAnalysis.completed_at
+        ).filter(
             CaseAnalysis.intern_id == intern_id
         ).order_by(desc(CaseAnalysis.updated_at)).limit(5).all()
         
@@ -235,15 +283,15 @@ def get_intern_details(intern_id):
                         'is_mandatory': comp.is_mandatory
                     },
                     'progress': {
-                        'status': intern_comp.status.value if intern_comp else 'NOT_STARTED',
-                        'progress_percentage': float(intern_comp.progress_percentage or 0) if intern_comp else 0,
-                        'hours_completed': float(intern_comp.hours_completed or 0) if intern_comp else 0,
-                        'grade': float(intern_comp.grade or 0) if intern_comp else None,
-                        'mentor_feedback': intern_comp.mentor_feedback if intern_comp else None,
-                        'started_at': intern_comp.started_at.isoformat() if intern_comp and intern_comp.started_at else None,
-                        'completed_at': intern_comp.completed_at.isoformat() if intern_comp and intern_comp.completed_at else None
+                        'status': comp.status.value if comp.status else 'NOT_STARTED',
+                        'progress_percentage': float(comp.progress_percentage),
+                        'hours_completed': float(comp.hours_completed),
+                        'grade': float(comp.grade or 0) if comp.intern_competency_id else None,
+                        'mentor_feedback': comp.mentor_feedback,
+                        'started_at': comp.started_at.isoformat() if comp.started_at else None,
+                        'completed_at': comp.completed_at.isoformat() if comp.completed_at else None
                     }
-                } for comp, intern_comp in competencies],
+                } for comp in competencies],
                 'recent_analyses': [{
                     'id': analysis.id,
                     'case_id': analysis.case_id,
@@ -266,43 +314,49 @@ def update_intern_competency(intern_id, comp_id):
     try:
         data = request.get_json()
         
-        # Verificar se estagiário existe
-        intern = db.session.query(Intern).filter(Intern.id == intern_id).first()
-        if not intern:
-            return jsonify({
-                'success': False,
-                'error': 'Estagiário não encontrado'
-            }), 404
-        
-        # Verificar se competência existe
-        competency = db.session.query(Competency).filter(Competency.id == comp_id).first()
-        if not competency:
-            return jsonify({
-                'success': False,
-                'error': 'Competência não encontrada'
-            }), 404
-        
-        # Buscar ou criar registro de competência do estagiário
+        # Buscar ou criar registro de competência do estagiário. Se o registro
+        # existe, as chaves estrangeiras garantem estagiário e competência
         intern_comp = db.session.query(InternCompetency).filter(
             and_(InternCompetency.intern_id == intern_id,
                  InternCompetency.competency_id == comp_id)
         ).first()
         
         if not intern_comp:
+            # Verificar existência de estagiário e competência sem carregar as linhas
+            intern_exists, competency_exists = db.session.query(
+                db.session.query(Intern.id).filter(Intern.id == intern_id).exists(),
+                db.session.query(Competency.id).filter(Competency.id == comp_id).exists()
+            ).one()
+            
+            if not intern_exists:
+                return jsonify({
+                    'success': False,
+                    'error': 'Estagiário não encontrado'
+                }), 404
+            
+            if not competency_exists:
+                return jsonify({
+                    'success': False,
+                    'error': 'Competência não encontrada'
+                }), 404
+            
             intern_comp = InternCompetency(
                 intern_id=intern_id,
                 competency_id=comp_id,
-                status=CompetencyStatus.NOT_STARTED
+                status=CompetencyStatus.NAO_INICIADO
             )
             db.session.add(intern_comp)
         
-        # Atualizar campos
+        # Atualizar campos (timestamp único para toda a atualização)
+        now = datetime.utcnow()
+        
         if 'status' in data:
-            intern_comp.status = CompetencyStatus(data['status'])
-            if data['status'] == 'IN_PROGRESS' and not intern_comp.started_at:
-                intern_comp.started_at = datetime.utcnow()
-            elif data['status'] == 'COMPLETED':
-                intern_comp.completed_at = datetime.utcnow()
+            status = _parse_enum(COMPETENCY_STATUS_BY_VALUE, data['status'], 'status')
+            intern_comp.status = status
+            if status is CompetencyStatus.EM_PROGRESSO and not intern_comp.started_at:
+                intern_comp.started_at = now
+            elif status in COMPLETED_COMPETENCY_STATUSES:
+                intern_comp.completed_at = now
         
         if 'progress_percentage' in data:
             intern_comp.progress_percentage = float(data['progress_percentage'])
@@ -311,14 +365,15 @@ def update_intern_competency(intern_id, comp_id):
             intern_comp.hours_completed = float(data['hours_completed'])
         
         if 'grade' in data:
-            intern_comp.grade = float(data['grade'])
+            intern_comp.score = float(data['grade'])
         
         if 'mentor_feedback' in data:
             intern_comp.mentor_feedback = data['mentor_feedback']
         
-        intern_comp.updated_at = datetime.utcnow()
+        intern_comp.updated_at = now
         
         db.session.commit()
+        invalidate_dashboard_cache()
         
         return jsonify({
             'success': True,
@@ -326,12 +381,19 @@ def update_intern_competency(intern_id, comp_id):
                 'status': intern_comp.status.value,
                 'progress_percentage': float(intern_comp.progress_percentage or 0),
                 'hours_completed': float(intern_comp.hours_completed or 0),
-                'grade': float(intern_comp.grade or 0) if intern_comp.grade else None,
+                'grade': float(intern_comp.score) if intern_comp.score is not None else None,
                 'mentor_feedback': intern_comp.mentor_feedback,
                 'updated_at': intern_comp.updated_at.isoformat()
             }
         }), 200
         
+    except ValidationError as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+        
     except Exception as e:
         db.session.rollback()
         return jsonify({
@@ -351,6 +413,7 @@ def get_cases():
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 20))
         search = request.args.get('search', '').strip()
+        cursor = request.args.get('cursor')
         
         # Query base
         query = db.session.query(EducationalCase).filter(
@@ -364,7 +427,7 @@ def get_cases():
             )
         
         if difficulty:
-            query = query.filter(EducationalCase.difficulty == CaseDifficulty(difficulty))
+            query = query.filter(EducationalCase.difficulty_level == _parse_enum(CASE_DIFFICULTY_BY_VALUE, difficulty, 'difficulty'))
         
         if search:
             query = query.filter(
@@ -374,10 +437,54 @@ def get_cases():
                 )
             )
         
-        # Ordenação e paginação
-        query = query.order_by(desc(EducationalCase.created_at))
-        cases = query.offset((page - 1) * per_page).limit(per_page).all()
-        total = query.count()
+        # Ordenação (o id desempata casos criados no mesmo instante)
+        # Carrega apenas as colunas exibidas no card do caso
+        query = query.order_by(
+            desc(EducationalCase.created_at), desc(EducationalCase.id)
+        ).options(
+            load_only(
+                EducationalCase.id, EducationalCase.title,
+                EducationalCase.description, EducationalCase.difficulty_level,
+                EducationalCase.estimated_time_minutes,
+                EducationalCase.views_count, EducationalCase.created_at
+            ),
+            selectinload(EducationalCase.specialties)
+        )
+        
+        if cursor:
+            # Paginação por cursor (keyset): o custo não depende da profundidade da página
+            try:
+                cursor_created_at, cursor_id = cursor.rsplit('_', 1)
+                cursor_key = (datetime.fromisoformat(cursor_created_at), int(cursor_id))
+            except ValueError:
+                return jsonify({
+                    'success': False,
+                    'error': 'Cursor inválido'
+                }), 400
+            
+            cases = query.filter(
+                tuple_(EducationalCase.created_at, EducationalCase.id) < cursor_key
+            ).limit(per_page + 1).all()
+            has_more = len(cases) > per_page
+            cases = cases[:per_page]
+            pagination = {
+                'per_page': per_page,
+                'has_more': has_more
+            }
+        else:
+            cases, total = MentorshipUtils.fetch_page(query, page, per_page)
+            has_more = page * per_page < total
+            pagination = {
+                'page': page,
+                'per_page': per_page,
+                'total': total,
+                'pages': (total + per_page - 1) // per_page
+            }
+        
+        pagination['next_cursor'] = (
+            f"{cases[-1].created_at.isoformat()}_{cases[-1].id}"
+            if cases and has_more else None
+        )
         
         return jsonify({
             'success': True,
@@ -386,7 +493,7 @@ def get_cases():
                     'id': case.id,
                     'title': case.title,
                     'description': case.description,
-                    'difficulty': case.difficulty.value,
+                    'difficulty': case.difficulty_level.value if case.difficulty_level else None,
                     'estimated_time_minutes': case.estimated_time_minutes,
                     'views_count': case.views_count,
                     'specialties': [{
@@ -395,15 +502,16 @@ def get_cases():
                     } for spec in case.specialties],
                     'created_at': case.created_at.isoformat()
                 } for case in cases],
-                'pagination': {
-                    'page': page,
-                    'per_page': per_page,
-                    'total': total,
-                    'pages': (total + per_page - 1) // per_page
-                }
+                'pagination': pagination
             }
         }), 200
         
+    except ValidationError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+        
     except Exception as e:
         return jsonify({
             'success': False,
@@ -432,7 +540,7 @@ def create_case():
             clinical_history=data['clinical_history'],
             physical_examination=data.get('physical_examination'),
             expected_outcomes=data.get('expected_outcomes'),
-            difficulty=CaseDifficulty(data['difficulty']),
+            difficulty_level=_parse_enum(CASE_DIFFICULTY_BY_VALUE, data['difficulty'], 'difficulty'),
             estimated_time_minutes=data.get('estimated_time_minutes', 60),
             is_published=data.get('is_published', False)
         )
@@ -448,6 +556,7 @@ def create_case():
             case.specialties = specialties
         
         db.session.commit()
+        invalidate_dashboard_cache()
         
         return jsonify({
             'success': True,
@@ -455,12 +564,19 @@ def create_case():
                 'id': case.id,
                 'title': case.title,
                 'description': case.description,
-                'difficulty': case.difficulty.value,
+                'difficulty': case.difficulty_level.value if case.difficulty_level else None,
                 'is_published': case.is_published,
                 'created_at': case.created_at.isoformat()
             }
         }), 201
         
+    except ValidationError as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+        
     except Exception as e:
         db.session.rollback()
         return jsonify({
@@ -472,9 +588,9 @@ def create_case():
 def get_case_details(case_id):
     """Retorna detalhes completos de um caso clínico"""
     try:
-        case = db.session.query(EducationalCase).filter(
-            EducationalCase.id == case_id
-        ).first()
+        case = db.session.get(
+            EducationalCase, case_id, options=[undefer_group('full_case')]
+        )
         
         if not case:
             return jsonify({
@@ -482,11 +598,19 @@ def get_case_details(case_id):
                 'error': 'Caso não encontrado'
             }), 404
         
-        # Incrementar contador de visualizações
-        case.views_count += 1
-        db.session.commit()
+        # Incrementar contador de visualizações com um UPDATE atômico
+        views_count = db.session.execute(
+            update(EducationalCase).where(
+                EducationalCase.id == case_id
+            ).values(
+                views_count=func.coalesce(EducationalCase.views_count, 0) + 1
+            ).returning(EducationalCase.views_count).execution_options(
+                synchronize_session=False
+            )
+        ).scalar()
         
-        return jsonify({
+        # A resposta é montada antes do commit para não recarregar o objeto expirado
+        response = jsonify({
             'success': True,
             'data': {
                 'id': case.id,
@@ -495,9 +619,9 @@ def get_case_details(case_id):
                 'clinical_history': case.clinical_history,
                 'physical_examination': case.physical_examination,
                 'expected_outcomes': case.expected_outcomes,
-                'difficulty': case.difficulty.value,
+                'difficulty': case.difficulty_level.value if case.difficulty_level else None,
                 'estimated_time_minutes': case.estimated_time_minutes,
-                'views_count': case.views_count,
+                'views_count': views_count,
                 'is_published': case.is_published,
                 'specialties': [{
                     'id': spec.id,
@@ -507,7 +631,10 @@ def get_case_details(case_id):
                 'created_at': case.created_at.isoformat(),
                 'updated_at': case.updated_at.isoformat()
             }
-        }), 200
+        })
+        db.session.commit()
+        
+        return response, 200
         
     except Exception as e:
         return jsonify({
@@ -536,10 +663,10 @@ def get_resources():
         
         # Filtros
         if resource_type:
-            query = query.filter(EducationalResource.resource_type == ResourceType(resource_type))
+            query = query.filter(EducationalResource.resource_type == _parse_enum(RESOURCE_TYPE_BY_VALUE, resource_type, 'resource_type'))
         
         if difficulty:
-            query = query.filter(EducationalResource.difficulty_level == CaseDifficulty(difficulty))
+            query = query.filter(EducationalResource.difficulty_level == _parse_enum(CASE_DIFFICULTY_BY_VALUE, difficulty, 'difficulty'))
         
         if is_featured is not None:
             query = query.filter(EducationalResource.is_featured == (is_featured.lower() == 'true'))
@@ -548,7 +675,8 @@ def get_resources():
             query = query.filter(EducationalResource.is_free == (is_free.lower() == 'true'))
         
         if tags:
-            query = query.join(EducationalResource.tags).filter(Tag.name.in_(tags))
+            # EXISTS em vez de JOIN: um recurso com várias tags não se repete
+            query = query.filter(EducationalResource.tags.any(Tag.name.in_(tags)))
         
         if search:
             query = query.filter(
@@ -559,17 +687,30 @@ def get_resources():
                 )
             )
         
-        # Ordenação
+        # Ordenação (a padrão, por data de inclusão, usa idx_educational_resources_added)
         if sort_by == 'rating':
             query = query.order_by(desc(EducationalResource.rating_average))
         elif sort_by == 'views':
             query = query.order_by(desc(EducationalResource.views_count))
         else:
-            query = query.order_by(desc(EducationalResource.created_at))
+            query = query.order_by(desc(EducationalResource.added_at))
         
         # Paginação
-        resources = query.offset((page - 1) * per_page).limit(per_page).all()
-        total = query.count()
+        # Carrega apenas as colunas exibidas no card do recurso
+        resources, total = MentorshipUtils.fetch_page(
+            query.options(
+                load_only(
+                    EducationalResource.id, EducationalResource.title,
+                    EducationalResource.description, EducationalResource.resource_type,
+                    EducationalResource.author, EducationalResource.duration_minutes,
+                    EducationalResource.difficulty_level, EducationalResource.is_featured,
+                    EducationalResource.is_free, EducationalResource.views_count,
+                    EducationalResource.downloads_count, EducationalResource.rating_average,
+                    EducationalResource.rating_count, EducationalResource.added_at
+                ),
+                selectinload(EducationalResource.tags)
+            ), page, per_page
+        )
         
         return jsonify({
             'success': True,
@@ -593,7 +734,7 @@ def get_resources():
                         'name': tag.name,
                         'color': tag.color
                     } for tag in resource.tags],
-                    'created_at': resource.created_at.isoformat()
+                    'created_at': resource.added_at.isoformat()
                 } for resource in resources],
                 'pagination': {
                     'page': page,
@@ -604,6 +745,12 @@ def get_resources():
             }
         }), 200
         
+    except ValidationError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+        
     except Exception as e:
         return jsonify({
             'success': False,
@@ -629,13 +776,13 @@ def create_resource():
         resource = EducationalResource(
             title=data['title'],
             description=data.get('description'),
-            resource_type=ResourceType(data['resource_type']),
+            resource_type=_parse_enum(RESOURCE_TYPE_BY_VALUE, data['resource_type'], 'resource_type'),
             content_url=data.get('content_url'),
             file_path=data.get('file_path'),
             author=data.get('author'),
             publication_date=datetime.fromisoformat(data['publication_date']) if data.get('publication_date') else None,
             duration_minutes=data.get('duration_minutes'),
-            difficulty_level=CaseDifficulty(data['difficulty_level']) if data.get('difficulty_level') else None,
+            difficulty_level=_parse_enum(CASE_DIFFICULTY_BY_VALUE, data['difficulty_level'], 'difficulty_level') if data.get('difficulty_level') else None,
             is_featured=data.get('is_featured', False),
             is_free=data.get('is_free', True),
             added_by_id=data.get('added_by_id')  # ID do usuário que está adicionando
@@ -644,16 +791,21 @@ def create_resource():
         db.session.add(resource)
         db.session.flush()  # Para obter o ID
         
-        # Associar tags se fornecidas
-        if 'tag_names' in data:
-            for tag_name in data['tag_names']:
-                tag = db.session.query(Tag).filter(Tag.name == tag_name).first()
-                if not tag:
-                    tag = Tag(name=tag_name)
-                    db.session.add(tag)
-                resource.tags.append(tag)
+        # Associar tags se fornecidas (cria as inexistentes em um único INSERT)
+        tag_names = list(dict.fromkeys(data.get('tag_names') or []))
+        if tag_names:
+            db.session.execute(
+                MentorshipUtils.on_conflict_insert(db.session, Tag).on_conflict_do_nothing(
+                    index_elements=['name']
+                ),
+                [{'name': tag_name} for tag_name in tag_names]
+            )
+            resource.tags = db.session.query(Tag).filter(Tag.name.in_(tag_names)).all()
         
         db.session.commit()
+        invalidate_dashboard_cache()
+        if tag_names:
+            _invalidate_reference_data(TAGS_CACHE_KEY)
         
         return jsonify({
             'success': True,
@@ -665,10 +817,17 @@ def create_resource():
                 'author': resource.author,
                 'is_featured': resource.is_featured,
                 'is_free': resource.is_free,
-                'created_at': resource.created_at.isoformat()
+                'created_at': resource.added_at.isoformat()
             }
         }), 201
         
+    except ValidationError as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+        
     except Exception as e:
         db.session.rollback()
         return jsonify({
@@ -680,9 +839,7 @@ def create_resource():
 def get_resource_details(resource_id):
     """Retorna detalhes completos de um recurso educacional"""
     try:
-        resource = db.session.query(EducationalResource).filter(
-            EducationalResource.id == resource_id
-        ).first()
+        resource = db.session.get(EducationalResource, resource_id)
         
         if not resource:
             return jsonify({
@@ -690,11 +847,19 @@ def get_resource_details(resource_id):
                 'error': 'Recurso não encontrado'
             }), 404
         
-        # Incrementar contador de visualizações
-        resource.views_count += 1
-        db.session.commit()
+        # Incrementar contador de visualizações com um UPDATE atômico
+        views_count = db.session.execute(
+            update(EducationalResource).where(
+                EducationalResource.id == resource_id
+            ).values(
+                views_count=func.coalesce(EducationalResource.views_count, 0) + 1
+            ).returning(EducationalResource.views_count).execution_options(
+                synchronize_session=False
+            )
+        ).scalar()
         
-        return jsonify({
+        # A resposta é montada antes do commit para não recarregar o objeto expirado
+        response = jsonify({
             'success': True,
             'data': {
                 'id': resource.id,
@@ -709,7 +874,7 @@ def get_resource_details(resource_id):
                 'difficulty_level': resource.difficulty_level.value if resource.difficulty_level else None,
                 'is_featured': resource.is_featured,
                 'is_free': resource.is_free,
-                'views_count': resource.views_count,
+                'views_count': views_count,
                 'downloads_count': resource.downloads_count,
                 'rating_average': float(resource.rating_average),
                 'rating_count': resource.rating_count,
@@ -718,10 +883,79 @@ def get_resource_details(resource_id):
                     'name': tag.name,
                     'color': tag.color
                 } for tag in resource.tags],
-                'created_at': resource.created_at.isoformat(),
+                'created_at': resource.added_at.isoformat(),
                 'updated_at': resource.updated_at.isoformat()
             }
-        }), 200
+        })
+        db.session.commit()
+        
+        return response, 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+# -- Reports Endpoints --
+EXPORT_CSV_HEADER = (
+    'Nome', 'Email', 'Telefone', 'Universidade', 'Semestre', 'Início',
+    'Término', 'Ativo', 'Horas Totais', 'Casos Concluídos', 'Média',
+    'Cadastrado em'
+)
+
+# Tamanho do buffer acumulado antes de enviar um chunk ao cliente
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+@mentorship_bp.route('/reports/export', methods=['GET'])
+def export_interns_report():
+    """Exporta os estagiários em CSV via streaming (memória constante)"""
+    try:
+        # Linhas Core (sem instâncias ORM) lidas em lotes do cursor
+        rows = db.session.execute(
+            select(
+                Intern.name, Intern.email, Intern.phone, Intern.university,
+                Intern.semester, Intern.start_date, Intern.end_date,
+                Intern.is_active, Intern.total_hours, Intern.completed_cases,
+                Intern.average_grade, Intern.created_at
+            ).order_by(Intern.name).execution_options(yield_per=1000)
+        )
+        
+        def generate():
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(EXPORT_CSV_HEADER)
+            
+            for intern in rows:
+                writer.writerow([
+                    intern.name,
+                    intern.email,
+                    intern.phone or '',
+                    intern.university or '',
+                    intern.semester or '',
+                    intern.start_date.isoformat() if intern.start_date else '',
+                    intern.end_date.isoformat() if intern.end_date else '',
+                    'Sim' if intern.is_active else 'Não',
+                    float(intern.total_hours or 0),
+                    intern.completed_cases or 0,
+                    float(intern.average_grade or 0),
+                    intern.created_at.isoformat() if intern.created_at else ''
+                ])
+                
+                if buffer.tell() >= EXPORT_CHUNK_SIZE:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+            
+            yield buffer.getvalue()
+        
+        filename = f"estagiarios_{time.strftime('%Y%m%d_%H%M%S', time.gmtime())}.csv"
+        
+        return Response(
+            stream_with_context(generate()),
+            mimetype='text/csv',
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
+        )
         
     except Exception as e:
         return jsonify({
@@ -730,21 +964,60 @@ def get_resource_details(resource_id):
         }), 500
 
 # -- Utility Endpoints --
+def _client_has_etag(etag):
+    """Verifica o If-None-Match ignorando o sufixo ':<algoritmo>' que o Flask-Compress
+    acrescenta ao ETag das respostas comprimidas"""
+    if_none_match = request.if_none_match
+    if if_none_match.star_tag:
+        return True
+    
+    compress_algorithms = current_app.config.get('COMPRESS_ALGORITHM', ())
+    for tag in if_none_match.as_set(include_weak=True):
+        base, separator, algorithm = tag.rpartition(':')
+        if separator and algorithm in compress_algorithms:
+            tag = base
+        if tag == etag:
+            return True
+    return False
+
+def _reference_data_response(cache_key, load_data):
+    """Responde dados de referência a partir do cache, com ETag para respostas 304"""
+    cached = cache.get(cache_key)
+    if cached is None:
+        data = load_data()
+        cached = {
+            'etag': hashlib.md5(current_app.json.dumps(data).encode()).hexdigest(),
+            'data': data
+        }
+        cache.set(cache_key, cached,
+                  timeout=MentorshipConfig.REFERENCE_DATA_CACHE_TIMEOUT)
+    
+    # Cliente já possui a versão atual: responde sem corpo
+    if _client_has_etag(cached['etag']):
+        response = Response(status=304)
+    else:
+        response = jsonify({
+            'success': True,
+            'data': cached['data']
+        })
+    
+    response.set_etag(cached['etag'])
+    return response
+
 @mentorship_bp.route('/specialties', methods=['GET'])
 def get_specialties():
     """Lista todas as especialidades disponíveis"""
     try:
-        specialties = db.session.query(Specialty).order_by(Specialty.name).all()
-        
-        return jsonify({
-            'success': True,
-            'data': [{
+        def load_specialties():
+            specialties = db.session.query(Specialty).order_by(Specialty.name).all()
+            return [{
                 'id': spec.id,
                 'name': spec.name,
                 'description': spec.description,
                 'icon': spec.icon
             } for spec in specialties]
-        }), 200
+        
+        return _reference_data_response(SPECIALTIES_CACHE_KEY, load_specialties)
         
     except Exception as e:
         return jsonify({
@@ -756,16 +1029,15 @@ def get_specialties():
 def get_tags():
     """Lista todas as tags disponíveis"""
     try:
-        tags = db.session.query(Tag).order_by(Tag.name).all()
-        
-        return jsonify({
-            'success': True,
-            'data': [{
+        def load_tags():
+            tags = db.session.query(Tag).order_by(Tag.name).all()
+            return [{
                 'id': tag.id,
                 'name': tag.name,
                 'color': tag.color
             } for tag in tags]
-        }), 200
+        
+        return _reference_data_response(TAGS_CACHE_KEY, load_tags)
         
     except Exception as e:
         return jsonify({
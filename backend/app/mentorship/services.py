@@ -1,12 +1,81 @@
 from datetime import datetime, timedelta
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, select, update
 from .models import (
     Intern, Competency, InternCompetency, EducationalCase, 
     EducationalResource, CaseAnalysis, Tag, Specialty, 
     MentorshipSession, StudyPlan, CompetencyStatus, 
     CaseDifficulty, ResourceType
 )
-from ..database import db
+from .config import MentorshipConfig
+from .utils import MentorshipUtils
+from .. import db, cache
+
+# Métricas do dashboard em cache: da rota /dashboard-stats e do serviço
+DASHBOARD_STATS_CACHE_KEY = 'mentorship:dashboard_stats'
+DASHBOARD_METRICS_CACHE_KEY = 'mentorship:dashboard_metrics'
+
+# Status que contam como competência concluída
+COMPLETED_COMPETENCY_STATUSES = (CompetencyStatus.CONCLUIDO, CompetencyStatus.APROVADO)
+
+
+def invalidate_dashboard_cache(*extra_keys):
+    """Invalida os dois caches do dashboard (e chaves extras) após uma escrita"""
+    cache.delete_many(DASHBOARD_STATS_CACHE_KEY, DASHBOARD_METRICS_CACHE_KEY, *extra_keys)
+
+
+def query_dashboard_stats():
+    """Métricas escalares do dashboard (rota e serviço) em uma única ida ao banco"""
+    last_month = datetime.utcnow() - timedelta(days=30)
+    return db.session.execute(select(
+        # Estatísticas gerais
+        select(func.count(Intern.id)).where(
+            Intern.is_active == True
+        ).scalar_subquery().label('total_interns'),
+        select(func.count(EducationalCase.id)).where(
+            EducationalCase.is_published == True
+        ).scalar_subquery().label('total_cases'),
+        select(func.count(EducationalResource.id)).scalar_subquery().label('total_resources'),
+        
+        # Estatísticas de progresso
+        select(func.count(InternCompetency.id)).where(
+            InternCompetency.status.in_(COMPLETED_COMPETENCY_STATUSES)
+        ).scalar_subquery().label('completed_competencies'),
+        select(func.count(InternCompetency.id)).where(
+            InternCompetency.status == CompetencyStatus.EM_PROGRESSO
+        ).scalar_subquery().label('in_progress_competencies'),
+        
+        # Casos analisados no último mês
+        select(func.count(CaseAnalysis.id)).where(
+            CaseAnalysis.completed_at >= last_month,
+            CaseAnalysis.is_completed == True
+        ).scalar_subquery().label('recent_case_analyses'),
+        
+        # Horas de estudo totais: acumuladas nos estagiários e nas competências
+        select(func.coalesce(func.sum(Intern.total_hours), 0)).scalar_subquery().label('total_study_hours'),
+        select(func.coalesce(func.sum(InternCompetency.hours_completed), 0)).scalar_subquery().label('total_competency_hours'),
+        
+        # Média de notas dos casos
+        select(func.coalesce(func.avg(CaseAnalysis.grade), 0)).where(
+            CaseAnalysis.grade.isnot(None)
+        ).scalar_subquery().label('avg_case_grade')
+    )).one()
+
+
+def query_top_interns(limit=5):
+    """Estagiários ativos com maior progresso médio nas competências"""
+    return db.session.query(
+        Intern.id,
+        Intern.name,
+        func.avg(InternCompetency.progress_percentage).label('avg_progress')
+    ).join(
+        InternCompetency
+    ).filter(
+        Intern.is_active == True
+    ).group_by(
+        Intern.id, Intern.name
+    ).order_by(
+        func.avg(InternCompetency.progress_percentage).desc()
+    ).limit(limit).all()
 
 class MentorshipService:
     """Serviço para lógica de negócio do módulo de mentoria"""
@@ -15,14 +84,21 @@ class MentorshipService:
     def calculate_intern_progress(intern_id):
         """Calcula o progresso geral de um estagiário"""
         try:
-            # Buscar todas as competências do estagiário
-            competencies = db.session.query(
-                InternCompetency
+            # Agrega todas as estatísticas no banco em uma única query
+            (total_competencies, completed_competencies, overall_progress,
+             total_hours, average_grade) = db.session.query(
+                func.count(InternCompetency.id),
+                func.count(InternCompetency.id).filter(
+                    InternCompetency.status.in_(COMPLETED_COMPETENCY_STATUSES)
+                ),
+                func.avg(func.coalesce(InternCompetency.progress_percentage, 0)),
+                func.sum(InternCompetency.hours_completed),
+                func.avg(InternCompetency.score)
             ).filter(
                 InternCompetency.intern_id == intern_id
-            ).all()
+            ).one()
             
-            if not competencies:
+            if not total_competencies:
                 return {
                     'overall_progress': 0.0,
                     'completed_competencies': 0,
@@ -31,32 +107,12 @@ class MentorshipService:
                     'average_grade': 0.0
                 }
             
-            total_competencies = len(competencies)
-            completed_competencies = sum(
-                1 for comp in competencies 
-                if comp.status == CompetencyStatus.COMPLETED
-            )
-            
-            total_progress = sum(
-                comp.progress_percentage or 0 
-                for comp in competencies
-            )
-            overall_progress = total_progress / total_competencies if total_competencies > 0 else 0
-            
-            total_hours = sum(
-                comp.hours_completed or 0 
-                for comp in competencies
-            )
-            
-            grades = [comp.grade for comp in competencies if comp.grade is not None]
-            average_grade = sum(grades) / len(grades) if grades else 0
-            
             return {
-                'overall_progress': round(overall_progress, 2),
+                'overall_progress': round(float(overall_progress or 0), 2),
                 'completed_competencies': completed_competencies,
                 'total_competencies': total_competencies,
-                'total_hours': round(total_hours, 2),
-                'average_grade': round(average_grade, 2)
+                'total_hours': round(float(total_hours or 0), 2),
+                'average_grade': round(float(average_grade or 0), 2)
             }
             
         except Exception as e:
@@ -66,10 +122,13 @@ class MentorshipService:
     def get_dashboard_metrics():
         """Calcula métricas para o dashboard"""
         try:
-            # Métricas básicas
-            total_interns = db.session.query(Intern).filter(Intern.is_active == True).count()
-            total_cases = db.session.query(EducationalCase).filter(EducationalCase.is_published == True).count()
-            total_resources = db.session.query(EducationalResource).count()
+            # Métricas em cache; invalidadas pelas operações de escrita do serviço
+            cached_metrics = cache.get(DASHBOARD_METRICS_CACHE_KEY)
+            if cached_metrics is not None:
+                return cached_metrics
+            
+            # Métricas escalares em uma única ida ao banco
+            stats = query_dashboard_stats()
             
             # Progresso das competências
             competency_stats = db.session.query(
@@ -86,49 +145,20 @@ class MentorshipService:
             for stat in competency_stats:
                 competency_counts[stat.status.value] = stat.count
             
-            # Casos analisados recentemente
-            last_month = datetime.utcnow() - timedelta(days=30)
-            recent_analyses = db.session.query(CaseAnalysis).filter(
-                CaseAnalysis.completed_at >= last_month,
-                CaseAnalysis.is_completed == True
-            ).count()
-            
-            # Horas totais de estudo
-            total_hours = db.session.query(
-                func.sum(InternCompetency.hours_completed)
-            ).scalar() or 0
-            
-            # Média de notas
-            avg_grade = db.session.query(
-                func.avg(CaseAnalysis.grade)
-            ).filter(
-                CaseAnalysis.grade.isnot(None)
-            ).scalar() or 0
-            
             # Top estagiários
-            top_interns = db.session.query(
-                Intern.id,
-                Intern.name,
-                func.avg(InternCompetency.progress_percentage).label('avg_progress')
-            ).join(
-                InternCompetency
-            ).group_by(
-                Intern.id, Intern.name
-            ).order_by(
-                func.avg(InternCompetency.progress_percentage).desc()
-            ).limit(5).all()
+            top_interns = query_top_interns()
             
-            return {
+            metrics = {
                 'overview': {
-                    'total_interns': total_interns,
-                    'total_cases': total_cases,
-                    'total_resources': total_resources,
-                    'total_study_hours': float(total_hours)
+                    'total_interns': stats.total_interns,
+                    'total_cases': stats.total_cases,
+                    'total_resources': stats.total_resources,
+                    'total_study_hours': float(stats.total_competency_hours)
                 },
                 'competencies': competency_counts,
                 'recent_activity': {
-                    'recent_case_analyses': recent_analyses,
-                    'avg_case_grade': float(avg_grade)
+                    'recent_case_analyses': stats.recent_case_analyses,
+                    'avg_case_grade': float(stats.avg_case_grade)
                 },
                 'top_performers': [{
                     'id': intern.id,
@@ -137,6 +167,10 @@ class MentorshipService:
                 } for intern in top_interns]
             }
             
+            cache.set(DASHBOARD_METRICS_CACHE_KEY, metrics,
+                      timeout=MentorshipConfig.DASHBOARD_CACHE_TIMEOUT)
+            return metrics
+            
         except Exception as e:
             raise Exception(f"Erro ao calcular métricas do dashboard: {str(e)}")
     
@@ -145,22 +179,23 @@ class MentorshipService:
         """Cria um plano de estudo personalizado"""
         try:
             # Verificar se estagiário existe
-            intern = db.session.query(Intern).filter(Intern.id == intern_id).first()
+            intern = db.session.get(Intern, intern_id)
             if not intern:
                 raise Exception("Estagiário não encontrado")
             
             # Calcular horas totais baseado nas competências
-            competencies = db.session.query(Competency).filter(
+            competencies_count, total_hours = db.session.query(
+                func.count(Competency.id),
+                func.coalesce(func.sum(Competency.required_hours), 0)
+            ).filter(
                 Competency.id.in_(competency_ids)
-            ).all()
-            
-            total_hours = sum(comp.required_hours for comp in competencies)
+            ).one()
             
             # Criar plano de estudo
             study_plan = StudyPlan(
                 intern_id=intern_id,
                 title=title or f"Plano de Estudo - {intern.name}",
-                description=f"Plano incluindo {len(competencies)} competências",
+                description=f"Plano incluindo {competencies_count} competências",
                 start_date=start_date,
                 end_date=end_date,
                 total_hours=total_hours
@@ -169,24 +204,23 @@ class MentorshipService:
             db.session.add(study_plan)
             db.session.flush()
             
-            # Criar registros de competências se não existirem
-            for comp_id in competency_ids:
-                existing = db.session.query(InternCompetency).filter(
-                    and_(
-                        InternCompetency.intern_id == intern_id,
-                        InternCompetency.competency_id == comp_id
-                    )
-                ).first()
-                
-                if not existing:
-                    intern_comp = InternCompetency(
-                        intern_id=intern_id,
-                        competency_id=comp_id,
-                        status=CompetencyStatus.NOT_STARTED
-                    )
-                    db.session.add(intern_comp)
+            # Criar registros de competências se não existirem (um único INSERT;
+            # os já existentes são ignorados pela restrição UNIQUE(intern_id, competency_id))
+            if competency_ids:
+                insert_stmt = MentorshipUtils.on_conflict_insert(db.session, InternCompetency)
+                db.session.execute(
+                    insert_stmt.on_conflict_do_nothing(
+                        index_elements=['intern_id', 'competency_id']
+                    ),
+                    [{
+                        'intern_id': intern_id,
+                        'competency_id': comp_id,
+                        'status': CompetencyStatus.NAO_INICIADO
+                    } for comp_id in dict.fromkeys(competency_ids)]
+                )
             
             db.session.commit()
+            invalidate_dashboard_cache()
             return study_plan
             
         except Exception as e:
@@ -198,50 +232,43 @@ class MentorshipService:
         """Submete uma análise de caso clínico"""
         try:
             # Verificar se caso e estagiário existem
-            case = db.session.query(EducationalCase).filter(
-                EducationalCase.id == case_id
-            ).first()
+            case = db.session.get(EducationalCase, case_id)
             if not case:
                 raise Exception("Caso clínico não encontrado")
             
-            intern = db.session.query(Intern).filter(
-                Intern.id == intern_id
-            ).first()
+            intern = db.session.get(Intern, intern_id)
             if not intern:
                 raise Exception("Estagiário não encontrado")
             
-            # Verificar se já existe análise
-            existing_analysis = db.session.query(CaseAnalysis).filter(
-                and_(
-                    CaseAnalysis.intern_id == intern_id,
-                    CaseAnalysis.case_id == case_id
-                )
-            ).first()
-            
-            if existing_analysis:
-                # Atualizar análise existente
-                analysis = existing_analysis
-            else:
-                # Criar nova análise
-                analysis = CaseAnalysis(
-                    intern_id=intern_id,
-                    case_id=case_id
-                )
-                db.session.add(analysis)
+            now = datetime.utcnow()
+            is_completed = analysis_data.get('is_completed', False)
             
-            # Atualizar dados da análise
-            analysis.analysis_text = analysis_data.get('analysis_text', '')
-            analysis.diagnosis_attempt = analysis_data.get('diagnosis_attempt')
-            analysis.treatment_proposal = analysis_data.get('treatment_proposal')
-            analysis.time_spent_minutes = analysis_data.get('time_spent_minutes')
-            analysis.is_completed = analysis_data.get('is_completed', False)
+            values = {
+                'analysis_text': analysis_data.get('analysis_text', ''),
+                'diagnosis_attempt': analysis_data.get('diagnosis_attempt'),
+                'treatment_proposal': analysis_data.get('treatment_proposal'),
+                'time_spent_minutes': analysis_data.get('time_spent_minutes'),
+                'is_completed': is_completed,
+                'updated_at': now
+            }
+            if is_completed:
+                values['completed_at'] = now
             
-            if analysis.is_completed:
-                analysis.completed_at = datetime.utcnow()
+            # Cria ou atualiza a análise em um único INSERT ... ON CONFLICT (intern_id, case_id)
+            stmt = MentorshipUtils.on_conflict_insert(db.session, CaseAnalysis).values(
+                intern_id=intern_id, case_id=case_id, **values
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['intern_id', 'case_id'],
+                set_={key: stmt.excluded[key] for key in values}
+            ).returning(CaseAnalysis)
             
-            analysis.updated_at = datetime.utcnow()
+            analysis = db.session.execute(
+                stmt, execution_options={'populate_existing': True}
+            ).scalar_one()
             
             db.session.commit()
+            invalidate_dashboard_cache()
             return analysis
             
         except Exception as e:
@@ -252,19 +279,32 @@ class MentorshipService:
     def get_recommended_resources(intern_id, limit=5):
         """Retorna recursos recomendados para um estagiário"""
         try:
-            # Buscar competências em progresso do estagiário
-            in_progress_competencies = db.session.query(
-                InternCompetency
-            ).filter(
-                and_(
+            # Verificar se há competências em progresso (sem carregar as linhas)
+            has_in_progress = db.session.query(
+                db.session.query(InternCompetency.id).filter(
                     InternCompetency.intern_id == intern_id,
-                    InternCompetency.status == CompetencyStatus.IN_PROGRESS
-                )
-            ).all()
+                    InternCompetency.status == CompetencyStatus.EM_PROGRESSO
+                ).exists()
+            ).scalar()
+            
+            # Apenas as colunas exibidas na recomendação (sem hidratar objetos ORM nem tags)
+            query = db.session.query(
+                EducationalResource.id,
+                EducationalResource.title,
+                EducationalResource.resource_type,
+                EducationalResource.author,
+                EducationalResource.duration_minutes,
+                EducationalResource.difficulty_level,
+                EducationalResource.is_featured,
+                EducationalResource.is_free,
+                EducationalResource.views_count,
+                EducationalResource.rating_average,
+                EducationalResource.rating_count
+            )
             
-            if not in_progress_competencies:
+            if not has_in_progress:
                 # Se não há competências em progresso, retornar recursos em destaque
-                resources = db.session.query(EducationalResource).filter(
+                resources = query.filter(
                     EducationalResource.is_featured == True
                 ).order_by(
                     EducationalResource.rating_average.desc()
@@ -272,7 +312,7 @@ class MentorshipService:
             else:
                 # Buscar recursos relacionados às competências em progresso
                 # (Esta lógica pode ser refinada baseada em tags, especialidades, etc.)
-                resources = db.session.query(EducationalResource).filter(
+                resources = query.filter(
                     EducationalResource.is_free == True
                 ).order_by(
                     EducationalResource.rating_average.desc(),
@@ -289,9 +329,7 @@ class MentorshipService:
         """Agenda uma sessão de mentoria"""
         try:
             # Verificar se estagiário existe
-            intern = db.session.query(Intern).filter(
-                Intern.id == intern_id
-            ).first()
+            intern = db.session.get(Intern, intern_id)
             if not intern:
                 raise Exception("Estagiário não encontrado")
             
@@ -318,50 +356,45 @@ class MentorshipService:
     def update_intern_statistics(intern_id):
         """Atualiza estatísticas calculadas do estagiário"""
         try:
-            intern = db.session.query(Intern).filter(
-                Intern.id == intern_id
-            ).first()
-            
-            if not intern:
+            # Recalcula e grava as estatísticas em um único UPDATE com subqueries
+            # correlacionadas (horas totais, casos completados e média de notas)
+            stats = db.session.execute(
+                update(Intern).where(
+                    Intern.id == intern_id
+                ).values(
+                    total_hours=select(
+                        func.coalesce(func.sum(InternCompetency.hours_completed), 0)
+                    ).where(
+                        InternCompetency.intern_id == Intern.id
+                    ).scalar_subquery(),
+                    completed_cases=select(
+                        func.count(CaseAnalysis.id)
+                    ).where(
+                        CaseAnalysis.intern_id == Intern.id,
+                        CaseAnalysis.is_completed == True
+                    ).scalar_subquery(),
+                    average_grade=select(
+                        func.coalesce(func.avg(CaseAnalysis.grade), 0)
+                    ).where(
+                        CaseAnalysis.intern_id == Intern.id,
+                        CaseAnalysis.grade.isnot(None)
+                    ).scalar_subquery(),
+                    updated_at=datetime.utcnow()
+                ).returning(
+                    Intern.total_hours, Intern.completed_cases, Intern.average_grade
+                ).execution_options(synchronize_session=False)
+            ).one_or_none()
+            
+            if stats is None:
                 raise Exception("Estagiário não encontrado")
             
-            # Calcular horas totais
-            total_hours = db.session.query(
-                func.sum(InternCompetency.hours_completed)
-            ).filter(
-                InternCompetency.intern_id == intern_id
-            ).scalar() or 0
-            
-            # Calcular casos completados
-            completed_cases = db.session.query(CaseAnalysis).filter(
-                and_(
-                    CaseAnalysis.intern_id == intern_id,
-                    CaseAnalysis.is_completed == True
-                )
-            ).count()
-            
-            # Calcular média de notas
-            avg_grade = db.session.query(
-                func.avg(CaseAnalysis.grade)
-            ).filter(
-                and_(
-                    CaseAnalysis.intern_id == intern_id,
-                    CaseAnalysis.grade.isnot(None)
-                )
-            ).scalar() or 0
-            
-            # Atualizar estagiário
-            intern.total_hours = float(total_hours)
-            intern.completed_cases = completed_cases
-            intern.average_grade = float(avg_grade)
-            intern.updated_at = datetime.utcnow()
-            
             db.session.commit()
+            invalidate_dashboard_cache()
             
             return {
-                'total_hours': intern.total_hours,
-                'completed_cases': intern.completed_cases,
-                'average_grade': intern.average_grade
+                'total_hours': float(stats.total_hours),
+                'completed_cases': stats.completed_cases,
+                'average_grade': float(stats.average_grade)
             }
             
         except Exception as e:
@@ -1,10 +1,86 @@
 from datetime import datetime, timedelta
 from functools import wraps
+from statistics import fmean
 from flask import request, jsonify, current_app
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
 import re
 import hashlib
 import os
-from typing import Dict, List, Optional, Tuple, Any
+import time
+import redis
+from typing import BinaryIO, Dict, List, Optional, Tuple, Any
+
+# RE2 (autômato de tempo linear) para validação de entrada, se disponível
+try:
+    import re2 as _validation_re
+except ImportError:
+    _validation_re = re
+
+# Tabela para remover caracteres não numéricos de strings ASCII via str.translate
+_NON_DIGIT_TABLE = str.maketrans('', '', ''.join(chr(c) for c in range(128) if not chr(c).isdigit()))
+
+# Expressões regulares pré-compiladas
+_EMAIL_RE = _validation_re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+_NON_DIGIT_RE = re.compile(r'\D')
+_UNSAFE_FILENAME_CHARS_RE = re.compile(r'[^\w\-_\.]')
+_MULTIPLE_UNDERSCORES_RE = re.compile(r'_+')
+_SLUG_INVALID_CHARS_RE = re.compile(r'[^\w\s-]')
+_SLUG_SEPARATORS_RE = re.compile(r'[-\s]+')
+
+# Tabela de remoção de acentos usada em generate_slug
+_SLUG_ACCENT_TABLE = str.maketrans({
+    'á': 'a', 'à': 'a', 'ã': 'a', 'â': 'a',
+    'é': 'e', 'ê': 'e',
+    'í': 'i',
+    'ó': 'o', 'ô': 'o', 'õ': 'o',
+    'ú': 'u', 'ü': 'u',
+    'ç': 'c'
+})
+
+# Token bucket atômico para rate limiting (uma única ida ao Redis por requisição).
+# KEYS[1] = chave do bucket; ARGV = capacidade, tokens por segundo, timestamp atual.
+# Retorna o número de tokens restantes, ou -1 quando o limite foi excedido.
+_RATE_LIMIT_LUA = """
+local capacity = tonumber(ARGV[1])
+local refill_rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * refill_rate)
+local allowed = tokens >= 1
+if allowed then
+    tokens = tokens - 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / refill_rate))
+if allowed then
+    return math.floor(tokens)
+end
+return -1
+"""
+
+# Script registrado por processo (EVALSHA com fallback automático para EVAL)
+_rate_limit_script = None
+
+# INSERT com ON CONFLICT por dialeto (PostgreSQL em produção, SQLite nos testes)
+_ON_CONFLICT_INSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+# Cores por nível de dificuldade e por status de competência
+_DIFFICULTY_COLORS = {
+    'BEGINNER': '#4CAF50',     # Verde
+    'INTERMEDIATE': '#FF9800', # Laranja
+    'ADVANCED': '#F44336'      # Vermelho
+}
+_STATUS_COLORS = {
+    'NOT_STARTED': '#9E9E9E',  # Cinza
+    'IN_PROGRESS': '#2196F3',  # Azul
+    'COMPLETED': '#4CAF50'     # Verde
+}
+
+# Hierarquia de tiers do sistema freemium
+TIER_HIERARCHY = {'free': 0, 'premium': 1, 'enterprise': 2}
 
 class ValidationError(Exception):
     """Exceção para erros de validação"""
@@ -16,14 +92,23 @@ class MentorshipUtils:
     @staticmethod
     def validate_email(email: str) -> bool:
         """Valida formato de email"""
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return re.match(pattern, email) is not None
+        # Rejeições baratas antes da expressão regular
+        if len(email) > 254 or '@' not in email:
+            return False
+        return _EMAIL_RE.fullmatch(email) is not None
     
     @staticmethod
     def validate_phone(phone: str) -> bool:
         """Valida formato de telefone brasileiro"""
-        # Remove caracteres não numéricos
-        clean_phone = re.sub(r'\D', '', phone)
+        # Menos de 10 caracteres não comporta DDD + número; mais de 20 excede qualquer formatação usual
+        if not 10 <= len(phone) <= 20:
+            return False
+        
+        # Remove caracteres não numéricos (translate cobre o caso comum ASCII)
+        if phone.isascii():
+            clean_phone = phone.translate(_NON_DIGIT_TABLE)
+        else:
+            clean_phone = _NON_DIGIT_RE.sub('', phone)
         
         # Verifica se tem 10 ou 11 dígitos (com DDD)
         return len(clean_phone) in [10, 11] and clean_phone.isdigit()
@@ -63,17 +148,22 @@ class MentorshipUtils:
     
     @staticmethod
     def generate_file_hash(file_content: bytes) -> str:
-        """Gera hash MD5 para conteúdo de arquivo"""
-        return hashlib.md5(file_content).hexdigest()
+        """Gera hash BLAKE2b (128 bits, mesmo tamanho do MD5) para conteúdo de arquivo"""
+        return hashlib.blake2b(file_content, digest_size=16).hexdigest()
+    
+    @staticmethod
+    def generate_file_hash_stream(file_obj: BinaryIO) -> str:
+        """Gera o mesmo hash de generate_file_hash lendo o arquivo em blocos (sem carregá-lo inteiro na memória)"""
+        return hashlib.file_digest(file_obj, lambda: hashlib.blake2b(digest_size=16)).hexdigest()
     
     @staticmethod
     def sanitize_filename(filename: str) -> str:
         """Sanitiza nome de arquivo removendo caracteres perigosos"""
         # Remove caracteres especiais e espaços
-        clean_name = re.sub(r'[^\w\-_\.]', '_', filename)
+        clean_name = _UNSAFE_FILENAME_CHARS_RE.sub('_', filename)
         
         # Remove underscores múltiplos
-        clean_name = re.sub(r'_+', '_', clean_name)
+        clean_name = _MULTIPLE_UNDERSCORES_RE.sub('_', clean_name)
         
         # Remove underscores no início e fim
         clean_name = clean_name.strip('_')
@@ -92,22 +182,26 @@ class MentorshipUtils:
     @staticmethod
     def get_difficulty_color(difficulty: str) -> str:
         """Retorna cor associada ao nível de dificuldade"""
-        colors = {
-            'BEGINNER': '#4CAF50',    # Verde
-            'INTERMEDIATE': '#FF9800', # Laranja
-            'ADVANCED': '#F44336'      # Vermelho
-        }
-        return colors.get(difficulty.upper(), '#9E9E9E')  # Cinza como padrão
+        return _DIFFICULTY_COLORS.get(difficulty.upper(), '#9E9E9E')  # Cinza como padrão
     
     @staticmethod
     def get_status_color(status: str) -> str:
         """Retorna cor associada ao status"""
-        colors = {
-            'NOT_STARTED': '#9E9E9E',  # Cinza
-            'IN_PROGRESS': '#2196F3',  # Azul
-            'COMPLETED': '#4CAF50'     # Verde
-        }
-        return colors.get(status.upper(), '#9E9E9E')
+        return _STATUS_COLORS.get(status.upper(), '#9E9E9E')
+    
+    @staticmethod
+    def fetch_page(query, page: int, per_page: int) -> Tuple[List[Any], int]:
+        """Retorna os itens da página e o total de registros em uma única query"""
+        # O total vem de COUNT(*) OVER (), calculado antes do LIMIT/OFFSET
+        rows = query.add_columns(
+            func.count().over().label('total_count')
+        ).offset((page - 1) * per_page).limit(per_page).all()
+        
+        if rows:
+            return [row[0] for row in rows], rows[0].total_count
+        
+        # Página vazia: só é preciso contar se houver páginas anteriores
+        return [], query.count() if page > 1 else 0
     
     @staticmethod
     def paginate_query(query, page: int = 1, per_page: int = 20, max_per_page: int = 100):
@@ -117,8 +211,7 @@ class MentorshipUtils:
         per_page = min(max(1, per_page), max_per_page)
         
         # Aplicar paginação
-        total = query.count()
-        items = query.offset((page - 1) * per_page).limit(per_page).all()
+        items, total = MentorshipUtils.fetch_page(query, page, per_page)
         
         # Calcular metadados de paginação
         total_pages = (total + per_page - 1) // per_page
@@ -139,6 +232,34 @@ class MentorshipUtils:
             }
         }
     
+    @staticmethod
+    def paginate_query_after(query, id_column, after_id: Optional[int] = None,
+                             per_page: int = 20, max_per_page: int = 100):
+        """Aplica paginação por chave (keyset) a uma query SQLAlchemy, sem COUNT nem OFFSET"""
+        per_page = min(max(1, per_page), max_per_page)
+        
+        if after_id is not None:
+            query = query.filter(id_column > after_id)
+        
+        # Busca um item a mais para saber se existe próxima página
+        items = query.order_by(id_column).limit(per_page + 1).all()
+        has_next = len(items) > per_page
+        items = items[:per_page]
+        
+        return {
+            'items': items,
+            'pagination': {
+                'per_page': per_page,
+                'has_next': has_next,
+                'next_after_id': getattr(items[-1], id_column.key) if has_next else None
+            }
+        }
+    
+    @staticmethod
+    def on_conflict_insert(session, model):
+        """Retorna um INSERT com suporte a ON CONFLICT no dialeto da sessão"""
+        return _ON_CONFLICT_INSERTS[session.get_bind().dialect.name](model)
+    
     @staticmethod
     def serialize_datetime(dt: Optional[datetime]) -> Optional[str]:
         """Serializa datetime para string ISO"""
@@ -158,7 +279,7 @@ class MentorshipUtils:
         if not ratings:
             return 0.0
         
-        return sum(ratings) / len(ratings)
+        return fmean(ratings)
     
     @staticmethod
     def generate_slug(text: str) -> str:
@@ -166,27 +287,21 @@ class MentorshipUtils:
         # Converter para minúsculas
         slug = text.lower()
         
-        # Remover acentos (simplificado)
-        replacements = {
-            'á': 'a', 'à': 'a', 'ã': 'a', 'â': 'a',
-            'é': 'e', 'ê': 'e',
-            'í': 'i',
-            'ó': 'o', 'ô': 'o', 'õ': 'o',
-            'ú': 'u', 'ü': 'u',
-            'ç': 'c'
-        }
-        
-        for old, new in replacements.items():
-            slug = slug.replace(old, new)
+        # Remover acentos (simplificado) em uma única passada
+        slug = slug.translate(_SLUG_ACCENT_TABLE)
         
         # Substituir espaços e caracteres especiais por hífens
-        slug = re.sub(r'[^\w\s-]', '', slug)
-        slug = re.sub(r'[-\s]+', '-', slug)
+        slug = _SLUG_INVALID_CHARS_RE.sub('', slug)
+        slug = _SLUG_SEPARATORS_RE.sub('-', slug)
         
         return slug.strip('-')
 
 def validate_request_data(required_fields: List[str], optional_fields: List[str] = None):
     """Decorator para validar dados de requisição"""
+    # Conjuntos montados uma vez, na decoração, e não a cada requisição
+    required = tuple(required_fields)
+    allowed_fields = frozenset(required_fields) | frozenset(optional_fields or ())
+    
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
@@ -196,14 +311,13 @@ def validate_request_data(required_fields: List[str], optional_fields: List[str]
                 return jsonify({'error': 'Dados JSON são obrigatórios'}), 400
             
             # Verificar campos obrigatórios
-            missing_fields = [field for field in required_fields if field not in data]
+            missing_fields = [field for field in required if field not in data]
             if missing_fields:
                 return jsonify({
                     'error': f'Campos obrigatórios ausentes: {", ".join(missing_fields)}'
                 }), 400
             
             # Filtrar apenas campos permitidos
-            allowed_fields = required_fields + (optional_fields or [])
             filtered_data = {k: v for k, v in data.items() if k in allowed_fields}
             
             # Adicionar dados filtrados aos kwargs
@@ -222,12 +336,14 @@ def handle_database_errors(f):
         except ValidationError as e:
             return jsonify({'error': str(e)}), 400
         except Exception as e:
-            current_app.logger.error(f"Erro no banco de dados: {str(e)}")
+            current_app.logger.error("Erro no banco de dados: %s", e)
             return jsonify({'error': 'Erro interno do servidor'}), 500
     return decorated_function
 
 def require_tier(min_tier: str = 'free'):
     """Decorator para verificar tier do usuário (sistema freemium)"""
+    required_level = TIER_HIERARCHY.get(min_tier, 0)
+    
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
@@ -237,9 +353,7 @@ def require_tier(min_tier: str = 'free'):
             # Placeholder - implementar baseado no sistema de autenticação
             user_tier = request.headers.get('X-User-Tier', 'free')
             
-            tier_hierarchy = {'free': 0, 'premium': 1, 'enterprise': 2}
-            
-            if tier_hierarchy.get(user_tier, 0) < tier_hierarchy.get(min_tier, 0):
+            if TIER_HIERARCHY.get(user_tier, 0) < required_level:
                 return jsonify({
                     'error': f'Acesso negado. Tier {min_tier} ou superior necessário.',
                     'current_tier': user_tier,
@@ -250,16 +364,41 @@ def require_tier(min_tier: str = 'free'):
         return decorated_function
     return decorator
 
+def _get_rate_limit_script():
+    """Retorna o script de rate limiting registrado no Redis (None sem REDIS_URL)"""
+    global _rate_limit_script
+    if _rate_limit_script is None:
+        redis_url = current_app.config.get('CACHE_REDIS_URL') or os.environ.get('REDIS_URL')
+        if not redis_url:
+            return None
+        _rate_limit_script = redis.from_url(redis_url).register_script(_RATE_LIMIT_LUA)
+    return _rate_limit_script
+
 def rate_limit(requests_per_minute: int = 60):
-    """Decorator para rate limiting"""
+    """Decorator para rate limiting (token bucket por IP e endpoint no Redis)"""
+    if requests_per_minute <= 0:
+        raise ValueError('requests_per_minute deve ser maior que zero')
+    refill_rate = requests_per_minute / 60.0
+    
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            # Implementar rate limiting baseado em IP ou usuário
-            # Placeholder - implementar com Redis ou cache em memória
-            
-            client_ip = request.remote_addr
-            # Aqui você implementaria a lógica de rate limiting
+            try:
+                script = _get_rate_limit_script()
+                if script is not None:
+                    key = f"rl:{request.remote_addr}:{request.endpoint}"
+                    remaining = script(
+                        keys=[key],
+                        args=[requests_per_minute, refill_rate, time.time()]
+                    )
+                    if remaining < 0:
+                        return jsonify({
+                            'error': 'Limite de requisições excedido',
+                            'retry_after': max(1, int(1 / refill_rate))
+                        }), 429
+            except (redis.RedisError, ValueError) as e:
+                # Redis indisponível ou URL inválida (ValueError): permite a requisição
+                current_app.logger.error("Erro no rate limiting: %s", e)
             
             return f(*args, **kwargs)
         return decorated_function
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""
+Configuração do Gunicorn
+
+Workers gevent: o gunicorn aplica o monkey patching da biblioteca padrão
+(sockets, ssl, threading) antes de carregar a app. O psycopg2 é uma extensão
+em C e não é coberto por esse patch; sem o psycogreen cada query bloquearia
+o hub inteiro do worker.
+"""
+
+bind = '0.0.0.0:5000'
+worker_class = 'gevent'
+worker_connections = 1000
+workers = 4
+timeout = 120
+
+
+def post_fork(server, worker):
+    """Torna o psycopg2 cooperativo com o gevent em cada worker."""
+    from psycogreen.gevent import patch_psycopg
+    patch_psycopg()
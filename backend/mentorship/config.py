@@ -7,9 +7,38 @@ incluindo tiers freemium, limites por plano e configurações específicas para
 """
 
 import os
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 from dataclasses import dataclass
+from functools import lru_cache
 from enum import Enum
+from contextvars import ContextVar
+
+
+# Snapshot das variáveis de ambiente, lido uma única vez na importação
+_ENV = dict(os.environ)
+
+# Valores aceitos como verdadeiro em variáveis booleanas
+_TRUE_VALUES = frozenset({'true', '1', 'yes', 'on'})
+
+
+def _env_bool(key: str, default: bool) -> bool:
+    """Lê um booleano do ambiente ('true', '1', 'yes' ou 'on', sem diferenciar maiúsculas)."""
+    value = _ENV.get(key)
+    if value is None:
+        return default
+    return value.strip().lower() in _TRUE_VALUES
+
+
+def _env_int(key: str, default: int) -> int:
+    """Lê um inteiro do ambiente."""
+    value = _ENV.get(key)
+    return default if value is None else int(value)
+
+
+def _env_float(key: str, default: float) -> float:
+    """Lê um float do ambiente."""
+    value = _ENV.get(key)
+    return default if value is None else float(value)
 
 
 class MentorshipTier(Enum):
@@ -19,7 +48,25 @@ class MentorshipTier(Enum):
     ENTERPRISE = "enterprise"
 
 
-@dataclass
+class FrozenDict(dict):
+    """Dicionário imutável e hashable para configurações constantes compartilhadas."""
+    
+    __slots__ = ()
+    
+    def _readonly(self, *args, **kwargs):
+        raise TypeError(f"'{type(self).__name__}' é imutável")
+    
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+    
+    def __hash__(self):
+        return hash(frozenset(self.items()))
+    
+    def __reduce__(self):
+        return type(self), (dict(self),)
+
+
+@dataclass(frozen=True, slots=True)
 class TierLimits:
     """Limites para cada tier do sistema freemium."""
     interns: int
@@ -36,51 +83,183 @@ class TierLimits:
     white_label: bool
 
 
+@dataclass(frozen=True, slots=True)
+class IOSConfig:
+    """Configurações específicas para a plataforma iOS."""
+    # Modo offline
+    offline_mode_enabled: bool
+    sync_interval_minutes: int
+    # Push notifications
+    push_notifications_enabled: bool
+    apns_certificate_path: Optional[str]
+    apns_key_id: Optional[str]
+    apns_team_id: Optional[str]
+    apns_bundle_id: str
+    # Cache local
+    local_cache_size_mb: int
+    cache_expiry_hours: int
+    # Otimizações de performance
+    image_compression_quality: float
+    video_compression_bitrate: int
+    # Configurações de rede
+    request_timeout_seconds: int
+    max_concurrent_downloads: int
+    # Recursos offline por tier
+    offline_resources_by_tier: FrozenDict
+
+
+@dataclass(frozen=True, slots=True)
+class AIConfig:
+    """Configurações de inteligência artificial."""
+    # Modelos disponíveis por tier
+    available_models_by_tier: FrozenDict
+    # Configurações de rate limiting para IA
+    rate_limits_by_tier: FrozenDict
+
+
+@dataclass(frozen=True, slots=True)
+class SecurityConfig:
+    """Configurações de segurança e compliance."""
+    # Criptografia
+    encryption_algorithm: str
+    data_retention_days: int
+    # Auditoria
+    audit_log_enabled: bool
+    audit_log_retention_days: int
+    # LGPD/GDPR
+    gdpr_compliance: bool
+    data_anonymization_enabled: bool
+    # Backup
+    backup_enabled: bool
+    backup_interval_hours: int
+    backup_retention_days: int
+
+
+@dataclass(frozen=True, slots=True)
+class TierProfile:
+    """Dados de um tier reunidos em um único registro."""
+    limits: TierLimits
+    offline_resources: FrozenDict
+    ai_models: Tuple[str, ...]
+    ai_rate_limits: FrozenDict
+
+
+IOS_CONFIG = IOSConfig(
+    offline_mode_enabled=_env_bool('MENTORSHIP_IOS_OFFLINE_MODE', True),
+    sync_interval_minutes=_env_int('MENTORSHIP_IOS_SYNC_INTERVAL', 15),
+    push_notifications_enabled=_env_bool('MENTORSHIP_IOS_PUSH_NOTIFICATIONS', True),
+    apns_certificate_path=_ENV.get('MENTORSHIP_IOS_APNS_CERT_PATH'),
+    apns_key_id=_ENV.get('MENTORSHIP_IOS_APNS_KEY_ID'),
+    apns_team_id=_ENV.get('MENTORSHIP_IOS_APNS_TEAM_ID'),
+    apns_bundle_id=_ENV.get('MENTORSHIP_IOS_APNS_BUNDLE_ID', 'com.fisioflow.mentorship'),
+    local_cache_size_mb=_env_int('MENTORSHIP_IOS_CACHE_SIZE_MB', 100),
+    cache_expiry_hours=_env_int('MENTORSHIP_IOS_CACHE_EXPIRY_HOURS', 24),
+    image_compression_quality=_env_float('MENTORSHIP_IOS_IMAGE_QUALITY', 0.8),
+    video_compression_bitrate=_env_int('MENTORSHIP_IOS_VIDEO_BITRATE', 1000000),  # 1Mbps
+    request_timeout_seconds=_env_int('MENTORSHIP_IOS_REQUEST_TIMEOUT', 30),
+    max_concurrent_downloads=_env_int('MENTORSHIP_IOS_MAX_DOWNLOADS', 3),
+    offline_resources_by_tier=FrozenDict({
+        MentorshipTier.FREE: FrozenDict({
+            'cases': 5,
+            'resources': 10,
+            'videos': 2
+        }),
+        MentorshipTier.PREMIUM: FrozenDict({
+            'cases': 25,
+            'resources': 50,
+            'videos': 10
+        }),
+        MentorshipTier.ENTERPRISE: FrozenDict({
+            'cases': -1,  # Ilimitado
+            'resources': -1,  # Ilimitado
+            'videos': -1  # Ilimitado
+        })
+    })
+)
+
+AI_CONFIG = AIConfig(
+    available_models_by_tier=FrozenDict({
+        MentorshipTier.FREE: ('gemini-pro-basic',),
+        MentorshipTier.PREMIUM: ('gemini-pro', 'gemini-pro-vision'),
+        MentorshipTier.ENTERPRISE: ('gemini-pro', 'gemini-pro-vision', 'gemini-ultra')
+    }),
+    rate_limits_by_tier=FrozenDict({
+        MentorshipTier.FREE: FrozenDict({
+            'requests_per_hour': 10,
+            'requests_per_day': 50
+        }),
+        MentorshipTier.PREMIUM: FrozenDict({
+            'requests_per_hour': 100,
+            'requests_per_day': 500
+        }),
+        MentorshipTier.ENTERPRISE: FrozenDict({
+            'requests_per_hour': -1,  # Ilimitado
+            'requests_per_day': -1  # Ilimitado
+        })
+    })
+)
+
+SECURITY_CONFIG = SecurityConfig(
+    encryption_algorithm=_ENV.get('MENTORSHIP_ENCRYPTION_ALGORITHM', 'AES-256-GCM'),
+    data_retention_days=_env_int('MENTORSHIP_DATA_RETENTION_DAYS', 2555),  # 7 anos
+    audit_log_enabled=_env_bool('MENTORSHIP_AUDIT_LOG', True),
+    audit_log_retention_days=_env_int('MENTORSHIP_AUDIT_RETENTION_DAYS', 2555),
+    gdpr_compliance=_env_bool('MENTORSHIP_GDPR_COMPLIANCE', True),
+    data_anonymization_enabled=_env_bool('MENTORSHIP_DATA_ANONYMIZATION', True),
+    backup_enabled=_env_bool('MENTORSHIP_BACKUP_ENABLED', True),
+    backup_interval_hours=_env_int('MENTORSHIP_BACKUP_INTERVAL_HOURS', 24),
+    backup_retention_days=_env_int('MENTORSHIP_BACKUP_RETENTION_DAYS', 90)
+)
+
+
+# Tier atual, isolado por contexto de execução (thread, greenlet ou tarefa async)
+_CURRENT_TIER: ContextVar[MentorshipTier] = ContextVar(
+    'mentorship_tier', default=MentorshipTier(_ENV.get('MENTORSHIP_TIER', 'free'))
+)
+
+
 class MentorshipConfig:
     """Configuração centralizada do módulo de mentoria."""
     
-    # Tier atual do sistema
-    CURRENT_TIER = MentorshipTier(os.getenv('MENTORSHIP_TIER', 'free'))
-    
     # Configurações de limites por tier
     TIER_LIMITS = {
         MentorshipTier.FREE: TierLimits(
-            interns=int(os.getenv('MENTORSHIP_FREE_INTERNS_LIMIT', 5)),
-            cases=int(os.getenv('MENTORSHIP_FREE_CASES_LIMIT', 10)),
-            resources=int(os.getenv('MENTORSHIP_FREE_RESOURCES_LIMIT', 20)),
-            sessions=int(os.getenv('MENTORSHIP_FREE_SESSIONS_LIMIT', 5)),
-            storage_bytes=int(os.getenv('MENTORSHIP_FREE_STORAGE_LIMIT', 1073741824)),  # 1GB
-            ai_requests_per_month=int(os.getenv('MENTORSHIP_FREE_AI_REQUESTS', 50)),
-            video_sessions_per_month=int(os.getenv('MENTORSHIP_FREE_VIDEO_SESSIONS', 2)),
-            custom_competencies=int(os.getenv('MENTORSHIP_FREE_CUSTOM_COMPETENCIES', 0)),
-            export_reports=os.getenv('MENTORSHIP_FREE_EXPORT_REPORTS', 'false').lower() == 'true',
+            interns=_env_int('MENTORSHIP_FREE_INTERNS_LIMIT', 5),
+            cases=_env_int('MENTORSHIP_FREE_CASES_LIMIT', 10),
+            resources=_env_int('MENTORSHIP_FREE_RESOURCES_LIMIT', 20),
+            sessions=_env_int('MENTORSHIP_FREE_SESSIONS_LIMIT', 5),
+            storage_bytes=_env_int('MENTORSHIP_FREE_STORAGE_LIMIT', 1073741824),  # 1GB
+            ai_requests_per_month=_env_int('MENTORSHIP_FREE_AI_REQUESTS', 50),
+            video_sessions_per_month=_env_int('MENTORSHIP_FREE_VIDEO_SESSIONS', 2),
+            custom_competencies=_env_int('MENTORSHIP_FREE_CUSTOM_COMPETENCIES', 0),
+            export_reports=_env_bool('MENTORSHIP_FREE_EXPORT_REPORTS', False),
             priority_support=False,
             advanced_analytics=False,
             white_label=False
         ),
         MentorshipTier.PREMIUM: TierLimits(
-            interns=int(os.getenv('MENTORSHIP_PREMIUM_INTERNS_LIMIT', 50)),
-            cases=int(os.getenv('MENTORSHIP_PREMIUM_CASES_LIMIT', 100)),
-            resources=int(os.getenv('MENTORSHIP_PREMIUM_RESOURCES_LIMIT', -1)),  # Ilimitado
-            sessions=int(os.getenv('MENTORSHIP_PREMIUM_SESSIONS_LIMIT', 50)),
-            storage_bytes=int(os.getenv('MENTORSHIP_PREMIUM_STORAGE_LIMIT', 10737418240)),  # 10GB
-            ai_requests_per_month=int(os.getenv('MENTORSHIP_PREMIUM_AI_REQUESTS', 500)),
-            video_sessions_per_month=int(os.getenv('MENTORSHIP_PREMIUM_VIDEO_SESSIONS', 20)),
-            custom_competencies=int(os.getenv('MENTORSHIP_PREMIUM_CUSTOM_COMPETENCIES', 50)),
-            export_reports=os.getenv('MENTORSHIP_PREMIUM_EXPORT_REPORTS', 'true').lower() == 'true',
+            interns=_env_int('MENTORSHIP_PREMIUM_INTERNS_LIMIT', 50),
+            cases=_env_int('MENTORSHIP_PREMIUM_CASES_LIMIT', 100),
+            resources=_env_int('MENTORSHIP_PREMIUM_RESOURCES_LIMIT', -1),  # Ilimitado
+            sessions=_env_int('MENTORSHIP_PREMIUM_SESSIONS_LIMIT', 50),
+            storage_bytes=_env_int('MENTORSHIP_PREMIUM_STORAGE_LIMIT', 10737418240),  # 10GB
+            ai_requests_per_month=_env_int('MENTORSHIP_PREMIUM_AI_REQUESTS', 500),
+            video_sessions_per_month=_env_int('MENTORSHIP_PREMIUM_VIDEO_SESSIONS', 20),
+            custom_competencies=_env_int('MENTORSHIP_PREMIUM_CUSTOM_COMPETENCIES', 50),
+            export_reports=_env_bool('MENTORSHIP_PREMIUM_EXPORT_REPORTS', True),
             priority_support=True,
             advanced_analytics=True,
             white_label=False
         ),
         MentorshipTier.ENTERPRISE: TierLimits(
-            interns=int(os.getenv('MENTORSHIP_ENTERPRISE_INTERNS_LIMIT', -1)),  # Ilimitado
-            cases=int(os.getenv('MENTORSHIP_ENTERPRISE_CASES_LIMIT', -1)),  # Ilimitado
-            resources=int(os.getenv('MENTORSHIP_ENTERPRISE_RESOURCES_LIMIT', -1)),  # Ilimitado
-            sessions=int(os.getenv('MENTORSHIP_ENTERPRISE_SESSIONS_LIMIT', -1)),  # Ilimitado
-            storage_bytes=int(os.getenv('MENTORSHIP_ENTERPRISE_STORAGE_LIMIT', -1)),  # Ilimitado
-            ai_requests_per_month=int(os.getenv('MENTORSHIP_ENTERPRISE_AI_REQUESTS', -1)),  # Ilimitado
-            video_sessions_per_month=int(os.getenv('MENTORSHIP_ENTERPRISE_VIDEO_SESSIONS', -1)),  # Ilimitado
-            custom_competencies=int(os.getenv('MENTORSHIP_ENTERPRISE_CUSTOM_COMPETENCIES', -1)),  # Ilimitado
+            interns=_env_int('MENTORSHIP_ENTERPRISE_INTERNS_LIMIT', -1),  # Ilimitado
+            cases=_env_int('MENTORSHIP_ENTERPRISE_CASES_LIMIT', -1),  # Ilimitado
+            resources=_env_int('MENTORSHIP_ENTERPRISE_RESOURCES_LIMIT', -1),  # Ilimitado
+            sessions=_env_int('MENTORSHIP_ENTERPRISE_SESSIONS_LIMIT', -1),  # Ilimitado
+            storage_bytes=_env_int('MENTORSHIP_ENTERPRISE_STORAGE_LIMIT', -1),  # Ilimitado
+            ai_requests_per_month=_env_int('MENTORSHIP_ENTERPRISE_AI_REQUESTS', -1),  # Ilimitado
+            video_sessions_per_month=_env_int('MENTORSHIP_ENTERPRISE_VIDEO_SESSIONS', -1),  # Ilimitado
+            custom_competencies=_env_int('MENTORSHIP_ENTERPRISE_CUSTOM_COMPETENCIES', -1),  # Ilimitado
             export_reports=True,
             priority_support=True,
             advanced_analytics=True,
@@ -88,104 +267,20 @@ class MentorshipConfig:
         )
     }
     
-    # Configurações específicas para iOS
-    class iOS:
-        """Configurações específicas para a plataforma iOS."""
-        
-        # Modo offline
-        OFFLINE_MODE_ENABLED = os.getenv('MENTORSHIP_IOS_OFFLINE_MODE', 'true').lower() == 'true'
-        SYNC_INTERVAL_MINUTES = int(os.getenv('MENTORSHIP_IOS_SYNC_INTERVAL', 15))
-        
-        # Push notifications
-        PUSH_NOTIFICATIONS_ENABLED = os.getenv('MENTORSHIP_IOS_PUSH_NOTIFICATIONS', 'true').lower() == 'true'
-        APNS_CERTIFICATE_PATH = os.getenv('MENTORSHIP_IOS_APNS_CERT_PATH')
-        APNS_KEY_ID = os.getenv('MENTORSHIP_IOS_APNS_KEY_ID')
-        APNS_TEAM_ID = os.getenv('MENTORSHIP_IOS_APNS_TEAM_ID')
-        APNS_BUNDLE_ID = os.getenv('MENTORSHIP_IOS_APNS_BUNDLE_ID', 'com.fisioflow.mentorship')
-        
-        # Cache local
-        LOCAL_CACHE_SIZE_MB = int(os.getenv('MENTORSHIP_IOS_CACHE_SIZE_MB', 100))
-        CACHE_EXPIRY_HOURS = int(os.getenv('MENTORSHIP_IOS_CACHE_EXPIRY_HOURS', 24))
-        
-        # Otimizações de performance
-        IMAGE_COMPRESSION_QUALITY = float(os.getenv('MENTORSHIP_IOS_IMAGE_QUALITY', 0.8))
-        VIDEO_COMPRESSION_BITRATE = int(os.getenv('MENTORSHIP_IOS_VIDEO_BITRATE', 1000000))  # 1Mbps
-        
-        # Configurações de rede
-        REQUEST_TIMEOUT_SECONDS = int(os.getenv('MENTORSHIP_IOS_REQUEST_TIMEOUT', 30))
-        MAX_CONCURRENT_DOWNLOADS = int(os.getenv('MENTORSHIP_IOS_MAX_DOWNLOADS', 3))
-        
-        # Recursos offline por tier
-        OFFLINE_RESOURCES_BY_TIER = {
-            MentorshipTier.FREE: {
-                'cases': 5,
-                'resources': 10,
-                'videos': 2
-            },
-            MentorshipTier.PREMIUM: {
-                'cases': 25,
-                'resources': 50,
-                'videos': 10
-            },
-            MentorshipTier.ENTERPRISE: {
-                'cases': -1,  # Ilimitado
-                'resources': -1,  # Ilimitado
-                'videos': -1  # Ilimitado
-            }
-        }
-    
-    # Configurações de IA
-    class AI:
-        """Configurações de inteligência artificial."""
-        
-        # Modelos disponíveis por tier
-        AVAILABLE_MODELS_BY_TIER = {
-            MentorshipTier.FREE: ['gemini-pro-basic'],
-            MentorshipTier.PREMIUM: ['gemini-pro', 'gemini-pro-vision'],
-            MentorshipTier.ENTERPRISE: ['gemini-pro', 'gemini-pro-vision', 'gemini-ultra']
-        }
-        
-        # Configurações de rate limiting para IA
-        AI_RATE_LIMITS = {
-            MentorshipTier.FREE: {
-                'requests_per_hour': 10,
-                'requests_per_day': 50
-            },
-            MentorshipTier.PREMIUM: {
-                'requests_per_hour': 100,
-                'requests_per_day': 500
-            },
-            MentorshipTier.ENTERPRISE: {
-                'requests_per_hour': -1,  # Ilimitado
-                'requests_per_day': -1  # Ilimitado
-            }
-        }
+    @classmethod
+    def get_current_tier(cls) -> MentorshipTier:
+        """Retorna o tier atual do contexto de execução."""
+        return _CURRENT_TIER.get()
     
-    # Configurações de segurança
-    class Security:
-        """Configurações de segurança e compliance."""
-        
-        # Criptografia
-        ENCRYPTION_ALGORITHM = os.getenv('MENTORSHIP_ENCRYPTION_ALGORITHM', 'AES-256-GCM')
-        DATA_RETENTION_DAYS = int(os.getenv('MENTORSHIP_DATA_RETENTION_DAYS', 2555))  # 7 anos
-        
-        # Auditoria
-        AUDIT_LOG_ENABLED = os.getenv('MENTORSHIP_AUDIT_LOG', 'true').lower() == 'true'
-        AUDIT_LOG_RETENTION_DAYS = int(os.getenv('MENTORSHIP_AUDIT_RETENTION_DAYS', 2555))
-        
-        # LGPD/GDPR
-        GDPR_COMPLIANCE = os.getenv('MENTORSHIP_GDPR_COMPLIANCE', 'true').lower() == 'true'
-        DATA_ANONYMIZATION_ENABLED = os.getenv('MENTORSHIP_DATA_ANONYMIZATION', 'true').lower() == 'true'
-        
-        # Backup
-        BACKUP_ENABLED = os.getenv('MENTORSHIP_BACKUP_ENABLED', 'true').lower() == 'true'
-        BACKUP_INTERVAL_HOURS = int(os.getenv('MENTORSHIP_BACKUP_INTERVAL_HOURS', 24))
-        BACKUP_RETENTION_DAYS = int(os.getenv('MENTORSHIP_BACKUP_RETENTION_DAYS', 90))
+    @classmethod
+    def get_current_profile(cls) -> TierProfile:
+        """Retorna o perfil (limites, recursos offline e IA) do tier atual."""
+        return TIER_PROFILES[_CURRENT_TIER.get()]
     
     @classmethod
     def get_current_limits(cls) -> TierLimits:
         """Retorna os limites do tier atual."""
-        return cls.TIER_LIMITS[cls.CURRENT_TIER]
+        return TIER_PROFILES[_CURRENT_TIER.get()].limits
     
     @classmethod
     def can_create_intern(cls, current_count: int) -> bool:
@@ -223,42 +318,69 @@ class MentorshipConfig:
     @classmethod
     def get_feature_availability(cls) -> Dict[str, bool]:
         """Retorna a disponibilidade de features para o tier atual."""
-        limits = cls.get_current_limits()
-        return {
-            'export_reports': limits.export_reports,
-            'priority_support': limits.priority_support,
-            'advanced_analytics': limits.advanced_analytics,
-            'white_label': limits.white_label,
-            'custom_competencies': limits.custom_competencies > 0,
-            'video_sessions': limits.video_sessions_per_month > 0,
-            'ai_assistance': limits.ai_requests_per_month > 0
-        }
+        return feature_availability_for_tier(_CURRENT_TIER.get())
     
     @classmethod
     def get_ios_config(cls) -> Dict[str, Any]:
         """Retorna configurações específicas para iOS."""
-        return {
-            'offline_mode': cls.iOS.OFFLINE_MODE_ENABLED,
-            'sync_interval': cls.iOS.SYNC_INTERVAL_MINUTES,
-            'push_notifications': cls.iOS.PUSH_NOTIFICATIONS_ENABLED,
-            'cache_size_mb': cls.iOS.LOCAL_CACHE_SIZE_MB,
-            'cache_expiry_hours': cls.iOS.CACHE_EXPIRY_HOURS,
-            'image_quality': cls.iOS.IMAGE_COMPRESSION_QUALITY,
-            'video_bitrate': cls.iOS.VIDEO_COMPRESSION_BITRATE,
-            'request_timeout': cls.iOS.REQUEST_TIMEOUT_SECONDS,
-            'max_downloads': cls.iOS.MAX_CONCURRENT_DOWNLOADS,
-            'offline_resources': cls.iOS.OFFLINE_RESOURCES_BY_TIER[cls.CURRENT_TIER]
-        }
+        return _IOS_CONFIGS[_CURRENT_TIER.get()]
     
     @classmethod
     def upgrade_tier(cls, new_tier: MentorshipTier) -> bool:
         """Simula upgrade de tier (em produção seria integrado com sistema de pagamento)."""
-        if new_tier.value in [tier.value for tier in MentorshipTier]:
-            cls.CURRENT_TIER = new_tier
+        if isinstance(new_tier, MentorshipTier):
+            _CURRENT_TIER.set(new_tier)
             return True
         return False
 
 
+# Todos os dados dependentes de tier, resolvidos com uma única busca por tier
+TIER_PROFILES = FrozenDict({
+    tier: TierProfile(
+        limits=MentorshipConfig.TIER_LIMITS[tier],
+        offline_resources=IOS_CONFIG.offline_resources_by_tier[tier],
+        ai_models=AI_CONFIG.available_models_by_tier[tier],
+        ai_rate_limits=AI_CONFIG.rate_limits_by_tier[tier]
+    )
+    for tier in MentorshipTier
+})
+
+
+@lru_cache(maxsize=None)
+def feature_availability_for_tier(tier: MentorshipTier) -> FrozenDict:
+    """Disponibilidade de features de um tier (calculada uma vez por tier)."""
+    limits = TIER_PROFILES[tier].limits
+    return FrozenDict({
+        'export_reports': limits.export_reports,
+        'priority_support': limits.priority_support,
+        'advanced_analytics': limits.advanced_analytics,
+        'white_label': limits.white_label,
+        'custom_competencies': limits.custom_competencies > 0,
+        'video_sessions': limits.video_sessions_per_month > 0,
+        'ai_assistance': limits.ai_requests_per_month > 0
+    })
+
+
+def _build_ios_config(tier: MentorshipTier) -> FrozenDict:
+    """Monta as configurações iOS de um tier."""
+    return FrozenDict({
+        'offline_mode': IOS_CONFIG.offline_mode_enabled,
+        'sync_interval': IOS_CONFIG.sync_interval_minutes,
+        'push_notifications': IOS_CONFIG.push_notifications_enabled,
+        'cache_size_mb': IOS_CONFIG.local_cache_size_mb,
+        'cache_expiry_hours': IOS_CONFIG.cache_expiry_hours,
+        'image_quality': IOS_CONFIG.image_compression_quality,
+        'video_bitrate': IOS_CONFIG.video_compression_bitrate,
+        'request_timeout': IOS_CONFIG.request_timeout_seconds,
+        'max_downloads': IOS_CONFIG.max_concurrent_downloads,
+        'offline_resources': TIER_PROFILES[tier].offline_resources
+    })
+
+
+# Configurações iOS pré-calculadas para todos os tiers
+_IOS_CONFIGS = {tier: _build_ios_config(tier) for tier in MentorshipTier}
+
+
 # Configurações de preços (para referência)
 TIER_PRICING = {
     MentorshipTier.FREE: {
@@ -280,25 +402,25 @@ TIER_PRICING = {
 
 
 # Configurações de notificações push para iOS
-PUSH_NOTIFICATION_TEMPLATES = {
-    'new_case_assigned': {
+PUSH_NOTIFICATION_TEMPLATES = FrozenDict({
+    'new_case_assigned': FrozenDict({
         'title': 'Novo Caso Clínico',
         'body': 'Um novo caso foi atribuído a você: {case_title}',
         'category': 'case_assignment'
-    },
-    'session_reminder': {
+    }),
+    'session_reminder': FrozenDict({
         'title': 'Lembrete de Sessão',
         'body': 'Sua sessão de mentoria começa em {minutes} minutos',
         'category': 'session_reminder'
-    },
-    'competency_milestone': {
+    }),
+    'competency_milestone': FrozenDict({
         'title': 'Parabéns!',
         'body': 'Você atingiu um marco na competência: {competency_name}',
         'category': 'achievement'
-    },
-    'resource_available': {
+    }),
+    'resource_available': FrozenDict({
         'title': 'Novo Recurso',
         'body': 'Um novo recurso educacional está disponível: {resource_title}',
         'category': 'resource_update'
-    }
-}
\ No newline at end of file
+    })
+})
@@ -94,13 +94,16 @@ class FreemiumService:
             )
         ).count()
         
-        # Conta recursos educacionais
-        resources_count = self.db.query(EducationalResource).filter(
-            and_(
-                EducationalResource.uploaded_by == user_id,
+        # Conta recursos educacionais do período e armazenamento total usado
+        # em uma única query (agregado condicional)
+        resources_count, storage_used = self.db.query(
+            func.count(EducationalResource.id).filter(
                 EducationalResource.created_at >= period_start
-            )
-        ).count()
+            ),
+            func.sum(EducationalResource.file_size)
+        ).filter(
+            EducationalResource.uploaded_by == user_id
+        ).one()
         
         # Conta sessões de mentoria
         sessions_count = self.db.query(MentorshipSession).filter(
@@ -110,13 +113,6 @@ class FreemiumService:
             )
         ).count()
         
-        # Calcula armazenamento usado
-        storage_used = self.db.query(
-            func.sum(EducationalResource.file_size)
-        ).filter(
-            EducationalResource.uploaded_by == user_id
-        ).scalar() or 0
-        
         # Conta competências customizadas
         custom_competencies_count = self.db.query(Competency).filter(
             and_(
@@ -141,7 +137,7 @@ class FreemiumService:
             cases_count=cases_count,
             resources_count=resources_count,
             sessions_count=sessions_count,
-            storage_used_bytes=int(storage_used),
+            storage_used_bytes=int(storage_used or 0),
             ai_requests_count=0,  # Implementar tracking de IA
             video_sessions_count=0,  # Implementar tracking de vídeo
             custom_competencies_count=custom_competencies_count,
@@ -256,10 +252,13 @@ class FreemiumService:
         
         elif action == 'upload_resource':
             file_size = kwargs.get('file_size', 0)
-            current_count = self.db.query(EducationalResource).filter(EducationalResource.uploaded_by == user_id).count()
-            current_storage = self.db.query(func.sum(EducationalResource.file_size)).filter(
+            current_count, current_storage = self.db.query(
+                func.count(EducationalResource.id),
+                func.sum(EducationalResource.file_size)
+            ).filter(
                 EducationalResource.uploaded_by == user_id
-            ).scalar() or 0
+            ).one()
+            current_storage = current_storage or 0
             
             if limits.resources != -1 and current_count >= limits.resources:
                 return False, f"Limite de recursos atingido ({current_count}/{limits.resources}). Faça upgrade para adicionar mais."
@@ -493,7 +492,7 @@ class FreemiumService:
         
         except Exception as e:
             self.db.rollback()
-            current_app.logger.error(f"Erro ao processar upgrade: {str(e)}")
+            current_app.logger.error("Erro ao processar upgrade: %s", e)
             return {
                 'success': False,
                 'error': 'Erro interno ao processar upgrade'
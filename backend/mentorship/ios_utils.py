@@ -17,7 +17,7 @@ from PIL import Image
 import redis
 from flask import current_app
 
-from .config import MentorshipConfig
+from .config import MentorshipConfig, IOS_CONFIG, PUSH_NOTIFICATION_TEMPLATES
 
 
 @dataclass
@@ -44,6 +44,35 @@ class OfflineResource:
     priority: int
 
 
+def _save_image_atomically(img: Image.Image, output_path: str, **save_kwargs) -> None:
+    """
+    Salva a imagem em um arquivo temporário no mesmo diretório e o renomeia
+    para o destino final, evitando arquivos parcialmente escritos.
+    
+    Args:
+        img: Imagem a ser salva
+        output_path: Caminho final da imagem
+        **save_kwargs: Parâmetros repassados para ``Image.save``
+    """
+    directory = os.path.dirname(output_path) or '.'
+    tmp_path = os.path.join(
+        directory, f'.{os.path.basename(output_path)}.{os.urandom(8).hex()}.tmp'
+    )
+    # Modo 0o666 com O_EXCL: a umask do processo se aplica como em um open() comum
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            img.save(tmp_file, **save_kwargs)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
 class iOSOptimizer:
     """Classe para otimizações específicas do iOS."""
     
@@ -79,7 +108,9 @@ class iOSOptimizer:
                     img.thumbnail(max_size, Image.Resampling.LANCZOS)
                 
                 # Salva com compressão
-                img.save(output_path, 'JPEG', quality=int(quality * 100), optimize=True)
+                _save_image_atomically(
+                    img, output_path, format='JPEG', quality=int(quality * 100), optimize=True
+                )
             
             return True, "Imagem comprimida com sucesso"
         
@@ -101,7 +132,7 @@ class iOSOptimizer:
         try:
             with Image.open(image_path) as img:
                 img.thumbnail(size, Image.Resampling.LANCZOS)
-                img.save(thumbnail_path, 'JPEG', quality=85, optimize=True)
+                _save_image_atomically(img, thumbnail_path, format='JPEG', quality=85, optimize=True)
             return True
         except Exception:
             return False
@@ -240,7 +271,7 @@ class iOSOptimizer:
             return True
         
         except Exception as e:
-            current_app.logger.error(f"Erro ao armazenar dados offline: {str(e)}")
+            current_app.logger.error("Erro ao armazenar dados offline: %s", e)
             return False
     
     def get_offline_data(self, user_id: str, entity_type: Optional[str] = None) -> List[SyncData]:
@@ -278,7 +309,7 @@ class iOSOptimizer:
             return sync_data_list
         
         except Exception as e:
-            current_app.logger.error(f"Erro ao recuperar dados offline: {str(e)}")
+            current_app.logger.error("Erro ao recuperar dados offline: %s", e)
             return []
     
     def cleanup_offline_data(self, user_id: str, max_age_days: int = 30) -> int:
@@ -314,7 +345,7 @@ class iOSOptimizer:
             return removed_count
         
         except Exception as e:
-            current_app.logger.error(f"Erro ao limpar dados offline: {str(e)}")
+            current_app.logger.error("Erro ao limpar dados offline: %s", e)
             return 0
     
     def get_sync_status(self, user_id: str) -> Dict[str, Any]:
@@ -352,7 +383,7 @@ class iOSOptimizer:
                 }
         
         except Exception as e:
-            current_app.logger.error(f"Erro ao obter status de sincronização: {str(e)}")
+            current_app.logger.error("Erro ao obter status de sincronização: %s", e)
             return {
                 'last_sync': None,
                 'entities_count': 0,
@@ -367,29 +398,8 @@ class PushNotificationManager:
     """Gerenciador de notificações push para iOS."""
     
     def __init__(self):
-        self.config = MentorshipConfig.iOS
-        self.templates = {
-            'new_case_assigned': {
-                'title': 'Novo Caso Clínico',
-                'body': 'Um novo caso foi atribuído a você: {case_title}',
-                'category': 'case_assignment'
-            },
-            'session_reminder': {
-                'title': 'Lembrete de Sessão',
-                'body': 'Sua sessão de mentoria começa em {minutes} minutos',
-                'category': 'session_reminder'
-            },
-            'competency_milestone': {
-                'title': 'Parabéns!',
-                'body': 'Você atingiu um marco na competência: {competency_name}',
-                'category': 'achievement'
-            },
-            'resource_available': {
-                'title': 'Novo Recurso',
-                'body': 'Um novo recurso educacional está disponível: {resource_title}',
-                'category': 'resource_update'
-            }
-        }
+        self.config = IOS_CONFIG
+        self.templates = PUSH_NOTIFICATION_TEMPLATES
     
     def format_notification(self, template_name: str, **kwargs) -> Dict[str, str]:
         """
@@ -407,8 +417,8 @@ class PushNotificationManager:
             raise ValueError(f"Template '{template_name}' não encontrado")
         
         return {
-            'title': template['title'].format(**kwargs),
-            'body': template['body'].format(**kwargs),
+            'title': template['title'].format_map(kwargs),
+            'body': template['body'].format_map(kwargs),
             'category': template['category']
         }
     
@@ -20,6 +20,54 @@ from .freemium_service import FreemiumService
 from .models import User, db
 
 
+# Rotas públicas (não requerem autenticação)
+PUBLIC_ROUTES = (
+    '/api/auth/login',
+    '/api/auth/register',
+    '/api/auth/refresh',
+    '/api/health',
+    '/api/metrics',
+    '/api/tiers/comparison'  # Comparação de tiers é pública
+)
+
+# Limites de requisições por tier
+TIER_RATE_LIMITS = {
+    MentorshipTier.FREE: {
+        'requests_per_minute': 30,
+        'requests_per_hour': 500,
+        'requests_per_day': 2000
+    },
+    MentorshipTier.PREMIUM: {
+        'requests_per_minute': 100,
+        'requests_per_hour': 2000,
+        'requests_per_day': 10000
+    },
+    MentorshipTier.ENTERPRISE: {
+        'requests_per_minute': -1,  # Ilimitado
+        'requests_per_hour': -1,
+        'requests_per_day': -1
+    }
+}
+
+# Mapeamento de rotas para ações sujeitas a limite
+ACTION_MAPPING = {
+    ('POST', '/api/mentorship/interns'): 'create_intern',
+    ('POST', '/api/mentorship/cases'): 'create_case',
+    ('POST', '/api/mentorship/resources'): 'upload_resource',
+    ('POST', '/api/mentorship/sessions'): 'schedule_session',
+    ('POST', '/api/mentorship/competencies'): 'create_custom_competency',
+    ('GET', '/api/mentorship/reports/export'): 'export_report',
+    ('POST', '/api/mentorship/ai/assist'): 'use_ai'
+}
+
+# Hierarquia de tiers
+TIER_HIERARCHY = {
+    MentorshipTier.FREE: 0,
+    MentorshipTier.PREMIUM: 1,
+    MentorshipTier.ENTERPRISE: 2
+}
+
+
 class FreemiumMiddleware:
     """Middleware para validação de limites freemium."""
     
@@ -90,41 +138,11 @@ class FreemiumMiddleware:
     
     def _is_public_route(self) -> bool:
         """Verifica se a rota é pública (não requer autenticação)."""
-        public_routes = [
-            '/api/auth/login',
-            '/api/auth/register',
-            '/api/auth/refresh',
-            '/api/health',
-            '/api/metrics',
-            '/api/tiers/comparison'  # Comparação de tiers é pública
-        ]
-        
-        return any(request.path.startswith(route) for route in public_routes)
+        return request.path.startswith(PUBLIC_ROUTES)
     
     def _apply_rate_limiting(self, user_id: str, tier: str) -> Dict[str, Any]:
         """Aplica rate limiting baseado no tier do usuário."""
-        tier_enum = MentorshipTier(tier)
-        
-        # Define limites por tier
-        rate_limits = {
-            MentorshipTier.FREE: {
-                'requests_per_minute': 30,
-                'requests_per_hour': 500,
-                'requests_per_day': 2000
-            },
-            MentorshipTier.PREMIUM: {
-                'requests_per_minute': 100,
-                'requests_per_hour': 2000,
-                'requests_per_day': 10000
-            },
-            MentorshipTier.ENTERPRISE: {
-                'requests_per_minute': -1,  # Ilimitado
-                'requests_per_hour': -1,
-                'requests_per_day': -1
-            }
-        }
-        
-        limits = rate_limits[tier_enum]
+        limits = TIER_RATE_LIMITS[MentorshipTier(tier)]
         
         # Verifica cada período
         for period, limit in limits.items():
@@ -142,20 +160,17 @@ class FreemiumMiddleware:
     
     def _check_rate_limit(self, user_id: str, period: str, limit: int) -> bool:
         """Verifica se o usuário está dentro do rate limit."""
-        now = datetime.now()
+        now = time.localtime()
         
-        # Define janela de tempo
+        # Define janela de tempo (o formato trunca para o início da janela)
         if period == 'requests_per_minute':
-            window_start = now.replace(second=0, microsecond=0)
-            window_key = f"rate_limit:{user_id}:minute:{window_start.strftime('%Y%m%d%H%M')}"
+            window_key = f"rate_limit:{user_id}:minute:{time.strftime('%Y%m%d%H%M', now)}"
             ttl = 60
         elif period == 'requests_per_hour':
-            window_start = now.replace(minute=0, second=0, microsecond=0)
-            window_key = f"rate_limit:{user_id}:hour:{window_start.strftime('%Y%m%d%H')}"
+            window_key = f"rate_limit:{user_id}:hour:{time.strftime('%Y%m%d%H', now)}"
             ttl = 3600
         elif period == 'requests_per_day':
-            window_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-            window_key = f"rate_limit:{user_id}:day:{window_start.strftime('%Y%m%d')}"
+            window_key = f"rate_limit:{user_id}:day:{time.strftime('%Y%m%d', now)}"
             ttl = 86400
         else:
             return True
@@ -171,7 +186,7 @@ class FreemiumMiddleware:
             return current_count <= limit
         
         except Exception as e:
-            current_app.logger.error(f"Erro no rate limiting: {str(e)}")
+            current_app.logger.error("Erro no rate limiting: %s", e)
             return True  # Em caso de erro, permite a requisição
     
     def _get_retry_after(self, period: str) -> int:
@@ -190,21 +205,8 @@ class FreemiumMiddleware:
             return {'allowed': True}
         
         user_id = g.current_user_id
-        method = request.method
-        path = request.path
-        
-        # Mapeia rotas para ações
-        action_mapping = {
-            ('POST', '/api/mentorship/interns'): 'create_intern',
-            ('POST', '/api/mentorship/cases'): 'create_case',
-            ('POST', '/api/mentorship/resources'): 'upload_resource',
-            ('POST', '/api/mentorship/sessions'): 'schedule_session',
-            ('POST', '/api/mentorship/competencies'): 'create_custom_competency',
-            ('GET', '/api/mentorship/reports/export'): 'export_report',
-            ('POST', '/api/mentorship/ai/assist'): 'use_ai'
-        }
         
-        action = action_mapping.get((method, path))
+        action = ACTION_MAPPING.get((request.method, request.path))
         if not action:
             return {'allowed': True}
         
@@ -263,7 +265,7 @@ class FreemiumMiddleware:
                 )
             
             # Armazena métricas no Redis para processamento posterior
-            metrics_key = f"usage_metrics:{datetime.now().strftime('%Y%m%d')}:{user_id}"
+            metrics_key = f"usage_metrics:{time.strftime('%Y%m%d')}:{user_id}"
             
             self.redis_client.lpush(
                 metrics_key,
@@ -274,28 +276,22 @@ class FreemiumMiddleware:
             self.redis_client.expire(metrics_key, 30 * 24 * 3600)
         
         except Exception as e:
-            current_app.logger.error(f"Erro ao registrar métricas: {str(e)}")
+            current_app.logger.error("Erro ao registrar métricas: %s", e)
 
 
 def require_tier(min_tier: str):
     """Decorator para exigir tier mínimo."""
+    required_tier = MentorshipTier(min_tier)
+    
     def decorator(f: Callable) -> Callable:
         @wraps(f)
         def decorated_function(*args, **kwargs):
             if not hasattr(g, 'current_tier'):
                 return jsonify({'error': 'Autenticação necessária'}), 401
             
-            required_tier = MentorshipTier(min_tier)
             current_tier = g.current_tier
             
-            # Hierarquia de tiers
-            tier_hierarchy = {
-                MentorshipTier.FREE: 0,
-                MentorshipTier.PREMIUM: 1,
-                MentorshipTier.ENTERPRISE: 2
-            }
-            
-            if tier_hierarchy[current_tier] < tier_hierarchy[required_tier]:
+            if TIER_HIERARCHY[current_tier] < TIER_HIERARCHY[required_tier]:
                 return jsonify({
                     'error': 'Tier insuficiente',
                     'message': f'Esta funcionalidade requer tier {required_tier.value} ou superior',
@@ -391,18 +387,19 @@ def _track_action_usage(user_id: str, action: str, status: str,
         }
         
         # Armazena no Redis
-        key = f"action_usage:{datetime.now().strftime('%Y%m%d')}:{user_id}:{action}"
+        today = time.strftime('%Y%m%d')
+        key = f"action_usage:{today}:{user_id}:{action}"
         
         redis_client.lpush(key, json.dumps(usage_data))
         redis_client.expire(key, 30 * 24 * 3600)  # 30 dias
         
         # Atualiza contadores diários
-        daily_counter_key = f"daily_usage:{user_id}:{action}:{datetime.now().strftime('%Y%m%d')}"
+        daily_counter_key = f"daily_usage:{user_id}:{action}:{today}"
         redis_client.incr(daily_counter_key)
         redis_client.expire(daily_counter_key, 24 * 3600)  # 24 horas
     
     except Exception as e:
-        current_app.logger.error(f"Erro ao rastrear uso: {str(e)}")
+        current_app.logger.error("Erro ao rastrear uso: %s", e)
 
 
 def log_request_start():
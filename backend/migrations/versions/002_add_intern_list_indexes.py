@@ -0,0 +1,22 @@
+"""Add intern list indexes
+
+Revision ID: 002_intern_list_indexes
+Revises: 001_mentorship
+Create Date: 2024-02-01 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '002_intern_list_indexes'
+down_revision = '001_mentorship'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Listagem de estagiários: filtro por is_active + ordenação por nome
+    op.create_index('idx_interns_active_name', 'interns', ['is_active', 'name'])
+
+def downgrade():
+    op.drop_index('idx_interns_active_name')
@@ -0,0 +1,40 @@
+"""Add foreign key indexes
+
+Revision ID: 003_foreign_key_indexes
+Revises: 002_intern_list_indexes
+Create Date: 2024-02-05 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '003_foreign_key_indexes'
+down_revision = '002_intern_list_indexes'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Chaves estrangeiras que não são a primeira coluna de nenhum índice existente
+    op.create_index('idx_intern_competencies_competency', 'intern_competencies', ['competency_id'])
+    op.create_index('idx_case_analyses_case', 'case_analyses', ['case_id'])
+    op.create_index('idx_study_plans_intern', 'study_plans', ['intern_id'])
+    op.create_index('idx_mentorship_sessions_intern', 'mentorship_sessions', ['intern_id'])
+    op.create_index('idx_mentorship_sessions_mentor', 'mentorship_sessions', ['mentor_id'])
+    op.create_index('idx_educational_resources_added_by', 'educational_resources', ['added_by_id'])
+    op.create_index('idx_resource_tags_tag', 'resource_tags', ['tag_id'])
+    op.create_index('idx_case_specialties_specialty', 'case_specialties', ['specialty_id'])
+    
+    # Detalhes do estagiário: análises recentes por intern_id ordenadas por updated_at
+    op.create_index('idx_case_analyses_intern_updated', 'case_analyses', ['intern_id', 'updated_at'])
+
+def downgrade():
+    op.drop_index('idx_case_analyses_intern_updated')
+    op.drop_index('idx_case_specialties_specialty')
+    op.drop_index('idx_resource_tags_tag')
+    op.drop_index('idx_educational_resources_added_by')
+    op.drop_index('idx_mentorship_sessions_mentor')
+    op.drop_index('idx_mentorship_sessions_intern')
+    op.drop_index('idx_study_plans_intern')
+    op.drop_index('idx_case_analyses_case')
+    op.drop_index('idx_intern_competencies_competency')
@@ -0,0 +1,32 @@
+"""Add partial indexes
+
+Revision ID: 004_partial_indexes
+Revises: 003_foreign_key_indexes
+Create Date: 2024-02-08 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '004_partial_indexes'
+down_revision = '003_foreign_key_indexes'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Dashboard: análises concluídas no último mês
+    op.create_index(
+        'idx_case_analyses_completed_at', 'case_analyses', ['completed_at'],
+        postgresql_where=sa.text('is_completed = true')
+    )
+    
+    # Recomendações: recursos em destaque ordenados por avaliação
+    op.create_index(
+        'idx_educational_resources_featured_rating', 'educational_resources', ['rating_average'],
+        postgresql_where=sa.text('is_featured = true')
+    )
+
+def downgrade():
+    op.drop_index('idx_educational_resources_featured_rating')
+    op.drop_index('idx_case_analyses_completed_at')
@@ -0,0 +1,63 @@
+"""Add list endpoint indexes
+
+Revision ID: 005_list_endpoint_indexes
+Revises: 004_partial_indexes
+Create Date: 2024-02-12 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '005_list_endpoint_indexes'
+down_revision = '004_partial_indexes'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Listagem de casos: filtro por is_published + ordenação por created_at
+    op.create_index('idx_educational_cases_published_created', 'educational_cases', ['is_published', 'created_at'])
+    
+    # Listagem de recursos: ordenações disponíveis (data de inclusão, avaliação, visualizações).
+    # (resource_type, added_at) também atende filtros só por tipo e substitui idx_educational_resources_type
+    op.create_index('idx_educational_resources_type_added', 'educational_resources', ['resource_type', 'added_at'])
+    op.drop_index('idx_educational_resources_type')
+    op.create_index('idx_educational_resources_added', 'educational_resources', ['added_at'])
+    op.create_index('idx_educational_resources_rating', 'educational_resources', ['rating_average'])
+    op.create_index('idx_educational_resources_views', 'educational_resources', ['views_count'])
+    
+    # Busca textual (ILIKE '%termo%') com índices trigram
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index(
+        'idx_educational_cases_title_trgm', 'educational_cases', ['title'],
+        postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'}
+    )
+    op.create_index(
+        'idx_educational_cases_description_trgm', 'educational_cases', ['description'],
+        postgresql_using='gin', postgresql_ops={'description': 'gin_trgm_ops'}
+    )
+    op.create_index(
+        'idx_educational_resources_title_trgm', 'educational_resources', ['title'],
+        postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'}
+    )
+    op.create_index(
+        'idx_educational_resources_description_trgm', 'educational_resources', ['description'],
+        postgresql_using='gin', postgresql_ops={'description': 'gin_trgm_ops'}
+    )
+    op.create_index(
+        'idx_educational_resources_author_trgm', 'educational_resources', ['author'],
+        postgresql_using='gin', postgresql_ops={'author': 'gin_trgm_ops'}
+    )
+
+def downgrade():
+    op.drop_index('idx_educational_resources_author_trgm')
+    op.drop_index('idx_educational_resources_description_trgm')
+    op.drop_index('idx_educational_resources_title_trgm')
+    op.drop_index('idx_educational_cases_description_trgm')
+    op.drop_index('idx_educational_cases_title_trgm')
+    op.drop_index('idx_educational_resources_views')
+    op.drop_index('idx_educational_resources_rating')
+    op.drop_index('idx_educational_resources_added')
+    op.create_index('idx_educational_resources_type', 'educational_resources', ['resource_type'])
+    op.drop_index('idx_educational_resources_type_added')
+    op.drop_index('idx_educational_cases_published_created')
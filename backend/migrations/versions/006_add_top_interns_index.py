@@ -0,0 +1,23 @@
+"""Add top interns ranking index
+
+Revision ID: 006_top_interns_index
+Revises: 005_list_endpoint_indexes
+Create Date: 2024-02-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '006_top_interns_index'
+down_revision = '005_list_endpoint_indexes'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Ranking de estagiários do dashboard: AVG(progress_percentage) agrupado por intern_id
+    # (permite index-only scan alimentando a agregação)
+    op.create_index('idx_intern_competencies_intern_progress', 'intern_competencies', ['intern_id', 'progress_percentage'])
+
+def downgrade():
+    op.drop_index('idx_intern_competencies_intern_progress')
@@ -13,7 +13,7 @@ from unittest.mock import Mock, patch, MagicMock
 from flask import Flask
 from flask_testing import TestCase
 
-from backend.mentorship.config import MentorshipConfig, MentorshipTier
+from backend.mentorship.config import MentorshipConfig, MentorshipTier, _CURRENT_TIER
 from backend.mentorship.freemium_service import FreemiumService, UsageMetrics
 from backend.mentorship.ios_utils import iOSOptimizer, PushNotificationManager
 from backend.mentorship.middleware import FreemiumMiddleware, require_tier, require_feature
@@ -110,8 +110,9 @@ class TestMentorshipConfig(FreemiumSystemTestCase):
         """Testa disponibilidade de features por tier."""
         config = MentorshipConfig()
         
-        # Simula tier FREE
-        config.CURRENT_TIER = MentorshipTier.FREE
+        # Simula tier FREE (o tier fica em uma ContextVar; restaurado ao final do teste)
+        token = _CURRENT_TIER.set(MentorshipTier.FREE)
+        self.addCleanup(_CURRENT_TIER.reset, token)
         features = config.get_feature_availability()
         
         self.assertFalse(features['export_reports'])
@@ -119,7 +120,7 @@ class TestMentorshipConfig(FreemiumSystemTestCase):
         self.assertFalse(features['white_label'])
         
         # Simula tier PREMIUM
-        config.CURRENT_TIER = MentorshipTier.PREMIUM
+        self.assertTrue(MentorshipConfig.upgrade_tier(MentorshipTier.PREMIUM))
         features = config.get_feature_availability()
         
         self.assertTrue(features['export_reports'])
@@ -136,6 +137,7 @@ class TestFreemiumService(FreemiumSystemTestCase):
         # Mock das queries
         mock_db.session.query.return_value.filter.return_value.count.return_value = 5
         mock_db.session.query.return_value.filter.return_value.scalar.return_value = 1024000
+        mock_db.session.query.return_value.filter.return_value.one.return_value = (5, 1024000)
         
         # Mock do usuário
         mock_user = Mock()
@@ -164,6 +166,7 @@ class TestFreemiumService(FreemiumSystemTestCase):
         # Mock das contagens (excedendo limites)
         mock_db.session.query.return_value.filter.return_value.count.return_value = 10  # Excede limite de 5
         mock_db.session.query.return_value.filter.return_value.scalar.return_value = 2147483648  # 2GB, excede 1GB
+        mock_db.session.query.return_value.filter.return_value.one.return_value = (10, 2147483648)
         
         service = FreemiumService(mock_db.session)
         validation = service.validate_tier_limits('free_user')
@@ -194,6 +197,7 @@ class TestFreemiumService(FreemiumSystemTestCase):
         # Testa upload de arquivo muito grande
         mock_db.session.query.return_value.filter.return_value.count.return_value = 1
         mock_db.session.query.return_value.filter.return_value.scalar.return_value = 1073741824  # 1GB usado
+        mock_db.session.query.return_value.filter.return_value.one.return_value = (1, 1073741824)
         
         can_upload, message = service.can_perform_action(
             'free_user', 'upload_resource', file_size=1073741824  # Mais 1GB
@@ -214,6 +218,7 @@ class TestFreemiumService(FreemiumSystemTestCase):
         # Mock de uso próximo ao limite (4 de 5 estagiários)
         mock_db.session.query.return_value.filter.return_value.count.return_value = 4
         mock_db.session.query.return_value.filter.return_value.scalar.return_value = 858993459  # ~800MB de 1GB
+        mock_db.session.query.return_value.filter.return_value.one.return_value = (4, 858993459)
         
         service = FreemiumService(mock_db.session)
         recommendations = service.get_upgrade_recommendations('free_user')
@@ -0,0 +1,578 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da API e dos serviços do módulo de mentoria
+
+Exercitam as rotas do Blueprint de mentoria e o MentorshipService
+contra um banco SQLite em memória.
+"""
+
+import csv
+import io
+import json
+import os
+import unittest
+from datetime import date, datetime
+from decimal import Decimal
+from unittest import mock
+
+import redis
+from flask.json.provider import DefaultJSONProvider
+from flask_testing import TestCase
+
+from app import create_app, db
+from app.mentorship.models import (
+    Base, User, Intern, Competency, InternCompetency, CompetencyStatus, Tag,
+    EducationalResource, ResourceType, EducationalCase, CaseDifficulty, CaseAnalysis
+)
+from app.mentorship import utils as mentorship_utils
+from app.mentorship.services import MentorshipService
+from app.mentorship.utils import rate_limit
+
+
+class MentorshipApiTestCase(TestCase):
+    """Classe base com app de testes e tabelas do módulo de mentoria."""
+    
+    def create_app(self):
+        """Cria aplicação Flask para testes."""
+        return create_app('testing')
+    
+    def setUp(self):
+        """Cria as tabelas e um estagiário de teste."""
+        Base.metadata.create_all(db.engine)
+        
+        user = User(name='Estagiário Teste', email='user@test.com')
+        db.session.add(user)
+        db.session.flush()
+        
+        self.intern = Intern(
+            user_id=user.id,
+            name='Estagiário Teste',
+            email='intern@test.com'
+        )
+        db.session.add(self.intern)
+        db.session.commit()
+    
+    def tearDown(self):
+        """Remove as tabelas criadas."""
+        db.session.remove()
+        Base.metadata.drop_all(db.engine)
+    
+    def add_competency(self, name, order_index=0, **progress):
+        """Cria uma competência e, se houver dados de progresso, o vínculo com o estagiário."""
+        competency = Competency(name=name, required_hours=10.0, order_index=order_index)
+        db.session.add(competency)
+        db.session.flush()
+        
+        if progress:
+            db.session.add(InternCompetency(
+                intern_id=self.intern.id,
+                competency_id=competency.id,
+                **progress
+            ))
+        db.session.commit()
+        return competency
+
+
+class TestInternDetailsEndpoint(MentorshipApiTestCase):
+    """Testes para GET /api/mentorship/interns/<id>."""
+    
+    def test_intern_details_returns_competency_scores(self):
+        """A nota da competência vem da coluna score e sai como 'grade'."""
+        self.add_competency(
+            'Avaliação', order_index=1,
+            status=CompetencyStatus.EM_PROGRESSO,
+            progress_percentage=50.0,
+            hours_completed=5.0,
+            score=8.5
+        )
+        self.add_competency('Técnica', order_index=2)
+        
+        response = self.client.get(f'/api/mentorship/interns/{self.intern.id}')
+        
+        self.assertEqual(response.status_code, 200)
+        competencies = response.json['data']['competencies']
+        self.assertEqual(len(competencies), 2)
+        
+        evaluated = competencies[0]['progress']
+        self.assertEqual(evaluated['grade'], 8.5)
+        self.assertEqual(evaluated['progress_percentage'], 50.0)
+        
+        # Competência sem vínculo: sem nota e progresso zerado
+        not_started = competencies[1]['progress']
+        self.assertIsNone(not_started['grade'])
+        self.assertEqual(not_started['progress_percentage'], 0.0)
+    
+    def test_intern_details_not_found(self):
+        """Estagiário inexistente retorna 404."""
+        response = self.client.get('/api/mentorship/interns/9999')
+        
+        self.assertEqual(response.status_code, 404)
+
+
+class TestUpdateInternCompetencyEndpoint(MentorshipApiTestCase):
+    """Testes para PUT /api/mentorship/interns/<id>/competencies/<id>."""
+    
+    def test_status_changes_set_timestamps(self):
+        """EM_PROGRESSO registra o início e CONCLUIDO registra a conclusão."""
+        competency = self.add_competency('Avaliação')
+        url = f'/api/mentorship/interns/{self.intern.id}/competencies/{competency.id}'
+        
+        started = self.client.put(url, json={'status': 'Em Progresso'})
+        self.assertEqual(started.status_code, 200)
+        self.assertEqual(started.json['data']['status'], 'Em Progresso')
+        self.assertIsNone(started.json['data']['grade'])
+        
+        completed = self.client.put(url, json={'status': 'Concluído', 'grade': 9})
+        self.assertEqual(completed.status_code, 200)
+        self.assertEqual(completed.json['data']['grade'], 9.0)
+        
+        intern_comp = db.session.query(InternCompetency).filter_by(
+            intern_id=self.intern.id, competency_id=competency.id
+        ).one()
+        self.assertIsNotNone(intern_comp.started_at)
+        self.assertIsNotNone(intern_comp.completed_at)
+        self.assertEqual(intern_comp.score, 9.0)
+    
+    def test_invalid_status_returns_400(self):
+        """Status fora do enum é rejeitado."""
+        competency = self.add_competency('Avaliação')
+        
+        response = self.client.put(
+            f'/api/mentorship/interns/{self.intern.id}/competencies/{competency.id}',
+            json={'status': 'IN_PROGRESS'}
+        )
+        
+        self.assertEqual(response.status_code, 400)
+
+
+class TestCalculateInternProgress(MentorshipApiTestCase):
+    """Testes para MentorshipService.calculate_intern_progress."""
+    
+    def test_progress_without_competencies(self):
+        """Estagiário sem competências retorna estatísticas zeradas."""
+        progress = MentorshipService.calculate_intern_progress(self.intern.id)
+        
+        self.assertEqual(progress, {
+            'overall_progress': 0.0,
+            'completed_competencies': 0,
+            'total_competencies': 0,
+            'total_hours': 0.0,
+            'average_grade': 0.0
+        })
+    
+    def test_progress_with_null_values(self):
+        """Valores nulos contam como zero no progresso e ficam fora da média de notas."""
+        self.add_competency(
+            'Avaliação',
+            status=CompetencyStatus.CONCLUIDO,
+            progress_percentage=100.0,
+            hours_completed=10.0,
+            score=9.0
+        )
+        self.add_competency(
+            'Técnica',
+            status=CompetencyStatus.EM_PROGRESSO,
+            progress_percentage=None,
+            hours_completed=None,
+            score=None
+        )
+        self.add_competency(
+            'Comunicação',
+            status=CompetencyStatus.APROVADO,
+            progress_percentage=50.0,
+            hours_completed=2.5,
+            score=7.0
+        )
+        
+        progress = MentorshipService.calculate_intern_progress(self.intern.id)
+        
+        self.assertEqual(progress['total_competencies'], 3)
+        self.assertEqual(progress['completed_competencies'], 2)
+        self.assertEqual(progress['overall_progress'], 50.0)
+        self.assertEqual(progress['total_hours'], 12.5)
+        self.assertEqual(progress['average_grade'], 8.0)
+
+
+class TestCreateStudyPlan(MentorshipApiTestCase):
+    """Testes para MentorshipService.create_study_plan."""
+    
+    def test_study_plan_links_missing_competencies_only(self):
+        """Vínculos existentes são mantidos e os novos entram como NAO_INICIADO."""
+        started = self.add_competency('Avaliação', status=CompetencyStatus.EM_PROGRESSO)
+        new = self.add_competency('Técnica')
+        
+        plan = MentorshipService.create_study_plan(
+            self.intern.id, [started.id, new.id, new.id],
+            datetime(2024, 3, 1), datetime(2024, 6, 1)
+        )
+        
+        self.assertEqual(plan.total_hours, 20.0)
+        statuses = dict(db.session.query(
+            InternCompetency.competency_id, InternCompetency.status
+        ).filter(InternCompetency.intern_id == self.intern.id).all())
+        self.assertEqual(statuses, {
+            started.id: CompetencyStatus.EM_PROGRESSO,
+            new.id: CompetencyStatus.NAO_INICIADO
+        })
+
+
+class TestSubmitCaseAnalysis(MentorshipApiTestCase):
+    """Testes para MentorshipService.submit_case_analysis."""
+    
+    def setUp(self):
+        super().setUp()
+        self.case = EducationalCase(title='Caso', description='Descrição', is_published=True)
+        db.session.add(self.case)
+        db.session.commit()
+    
+    def test_resubmission_updates_existing_analysis(self):
+        """Uma nova submissão atualiza a análise do estagiário para o caso."""
+        draft = MentorshipService.submit_case_analysis(
+            self.intern.id, self.case.id, {'analysis_text': 'Rascunho'}
+        )
+        self.assertFalse(draft.is_completed)
+        self.assertIsNone(draft.completed_at)
+        
+        final = MentorshipService.submit_case_analysis(
+            self.intern.id, self.case.id,
+            {'analysis_text': 'Versão final', 'is_completed': True}
+        )
+        
+        self.assertEqual(final.id, draft.id)
+        self.assertEqual(final.analysis_text, 'Versão final')
+        self.assertTrue(final.is_completed)
+        self.assertIsNotNone(final.completed_at)
+        self.assertEqual(db.session.query(CaseAnalysis).count(), 1)
+
+
+class TestRecommendedResources(MentorshipApiTestCase):
+    """Testes para MentorshipService.get_recommended_resources."""
+    
+    def setUp(self):
+        super().setUp()
+        db.session.add_all([
+            EducationalResource(title='Destaque pago', resource_type=ResourceType.CURSO,
+                                is_featured=True, is_free=False, rating_average=4.5),
+            EducationalResource(title='Gratuito', resource_type=ResourceType.ARTIGO,
+                                is_featured=False, is_free=True, rating_average=4.0),
+        ])
+        db.session.commit()
+    
+    def test_featured_resources_without_competencies_in_progress(self):
+        """Sem competências em progresso, recomenda os recursos em destaque."""
+        resources = MentorshipService.get_recommended_resources(self.intern.id)
+        
+        self.assertEqual([resource.title for resource in resources], ['Destaque pago'])
+    
+    def test_free_resources_with_competency_in_progress(self):
+        """Com competência EM_PROGRESSO, recomenda os recursos gratuitos."""
+        self.add_competency('Avaliação', status=CompetencyStatus.EM_PROGRESSO)
+        
+        resources = MentorshipService.get_recommended_resources(self.intern.id)
+        
+        self.assertEqual([resource.title for resource in resources], ['Gratuito'])
+
+
+class TestDashboardStatsEndpoint(MentorshipApiTestCase):
+    """Testes para GET /api/mentorship/dashboard-stats."""
+    
+    def test_dashboard_stats_counts_competencies_by_status(self):
+        """Concluídas incluem CONCLUIDO e APROVADO; em progresso usa EM_PROGRESSO."""
+        self.add_competency('Avaliação', status=CompetencyStatus.CONCLUIDO, progress_percentage=100.0)
+        self.add_competency('Técnica', status=CompetencyStatus.APROVADO, progress_percentage=100.0)
+        self.add_competency('Comunicação', status=CompetencyStatus.EM_PROGRESSO, progress_percentage=40.0)
+        self.add_competency('Ética', status=CompetencyStatus.NAO_INICIADO)
+        
+        response = self.client.get('/api/mentorship/dashboard-stats')
+        
+        self.assertEqual(response.status_code, 200)
+        data = response.json['data']
+        self.assertEqual(data['overview']['total_interns'], 1)
+        self.assertEqual(data['progress']['completed_competencies'], 2)
+        self.assertEqual(data['progress']['in_progress_competencies'], 1)
+        self.assertEqual(data['top_interns'][0]['id'], self.intern.id)
+        self.assertEqual(data['top_interns'][0]['avg_progress'], 60.0)
+
+
+class TestDashboardMetrics(MentorshipApiTestCase):
+    """Testes para MentorshipService.get_dashboard_metrics."""
+    
+    def test_dashboard_metrics_overview(self):
+        """As horas de estudo do serviço somam as horas das competências."""
+        self.add_competency('Avaliação', status=CompetencyStatus.CONCLUIDO,
+                            progress_percentage=100.0, hours_completed=6.0)
+        self.add_competency('Técnica', status=CompetencyStatus.EM_PROGRESSO,
+                            progress_percentage=50.0, hours_completed=1.5)
+        
+        metrics = MentorshipService.get_dashboard_metrics()
+        
+        self.assertEqual(metrics['overview']['total_interns'], 1)
+        self.assertEqual(metrics['overview']['total_study_hours'], 7.5)
+        self.assertEqual(metrics['recent_activity']['recent_case_analyses'], 0)
+        self.assertEqual(metrics['top_performers'][0]['avg_progress'], 75.0)
+
+
+class TestCasesEndpoints(MentorshipApiTestCase):
+    """Testes para GET /api/mentorship/cases e /cases/<id>."""
+    
+    def setUp(self):
+        super().setUp()
+        self.cases = [
+            EducationalCase(
+                title=f'Caso {i}', description='Descrição', is_published=True,
+                difficulty_level=difficulty, created_at=datetime(2024, 3, i + 1)
+            ) for i, difficulty in enumerate([
+                CaseDifficulty.INICIANTE, CaseDifficulty.INTERMEDIARIO, CaseDifficulty.AVANCADO
+            ])
+        ]
+        db.session.add_all(self.cases)
+        db.session.commit()
+    
+    def test_cursor_pagination(self):
+        """next_cursor leva à página seguinte e é nulo na última."""
+        first = self.client.get('/api/mentorship/cases?per_page=2')
+        self.assertEqual(first.status_code, 200)
+        data = first.json['data']
+        self.assertEqual([case['title'] for case in data['cases']], ['Caso 2', 'Caso 1'])
+        self.assertEqual(data['pagination']['total'], 3)
+        next_cursor = data['pagination']['next_cursor']
+        self.assertIsNotNone(next_cursor)
+        
+        second = self.client.get(
+            '/api/mentorship/cases', query_string={'per_page': 2, 'cursor': next_cursor}
+        )
+        self.assertEqual(second.status_code, 200)
+        data = second.json['data']
+        self.assertEqual([case['title'] for case in data['cases']], ['Caso 0'])
+        self.assertFalse(data['pagination']['has_more'])
+        self.assertIsNone(data['pagination']['next_cursor'])
+    
+    def test_invalid_cursor_returns_400(self):
+        """Cursor malformado é rejeitado."""
+        response = self.client.get('/api/mentorship/cases?cursor=invalido')
+        
+        self.assertEqual(response.status_code, 400)
+    
+    def test_filter_by_difficulty(self):
+        """O filtro de dificuldade usa difficulty_level."""
+        response = self.client.get('/api/mentorship/cases?difficulty=3')
+        
+        self.assertEqual(response.status_code, 200)
+        cases = response.json['data']['cases']
+        self.assertEqual([case['title'] for case in cases], ['Caso 1'])
+        self.assertEqual(cases[0]['difficulty'], 3)
+    
+    def test_create_case(self):
+        """A dificuldade recebida é gravada em difficulty_level."""
+        response = self.client.post('/api/mentorship/cases', json={
+            'title': 'Novo caso',
+            'description': 'Descrição',
+            'clinical_history': 'Histórico',
+            'difficulty': 5
+        })
+        
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json['data']['difficulty'], 5)
+        case = db.session.get(EducationalCase, response.json['data']['id'])
+        self.assertEqual(case.difficulty_level, CaseDifficulty.AVANCADO)
+    
+    def test_case_details_increments_views(self):
+        """Cada acesso aos detalhes incrementa o contador de visualizações."""
+        url = f'/api/mentorship/cases/{self.cases[0].id}'
+        
+        self.assertEqual(self.client.get(url).json['data']['views_count'], 1)
+        self.assertEqual(self.client.get(url).json['data']['views_count'], 2)
+
+
+class TestResourcesEndpoints(MentorshipApiTestCase):
+    """Testes para GET /api/mentorship/resources e /resources/<id>."""
+    
+    def setUp(self):
+        super().setUp()
+        self.resources = [
+            EducationalResource(
+                title=f'Recurso {i}', resource_type=ResourceType.ARTIGO,
+                added_at=datetime(2024, 3, i + 1)
+            ) for i in range(2)
+        ]
+        db.session.add_all(self.resources)
+        db.session.commit()
+    
+    def test_list_ordered_by_added_at(self):
+        """A ordenação padrão lista os recursos mais recentes primeiro."""
+        response = self.client.get('/api/mentorship/resources')
+        
+        self.assertEqual(response.status_code, 200)
+        resources = response.json['data']['resources']
+        self.assertEqual([resource['title'] for resource in resources], ['Recurso 1', 'Recurso 0'])
+        self.assertEqual(resources[0]['created_at'], '2024-03-02T00:00:00')
+    
+    def test_create_resource_reuses_existing_tags(self):
+        """Tags existentes são reaproveitadas e as novas criadas no mesmo INSERT."""
+        db.session.add(Tag(name='Ortopedia', color='#ff0000'))
+        db.session.commit()
+        
+        response = self.client.post('/api/mentorship/resources', json={
+            'title': 'Novo recurso',
+            'resource_type': 'Artigo',
+            'tag_names': ['Ortopedia', 'Neurologia', 'Neurologia']
+        })
+        
+        self.assertEqual(response.status_code, 201)
+        resource = db.session.get(EducationalResource, response.json['data']['id'])
+        self.assertEqual(sorted(tag.name for tag in resource.tags), ['Neurologia', 'Ortopedia'])
+        self.assertEqual(db.session.query(Tag).count(), 2)
+        self.assertEqual(db.session.query(Tag).filter_by(name='Ortopedia').one().color, '#ff0000')
+    
+    def test_resource_details_increments_views(self):
+        """Cada acesso aos detalhes incrementa o contador de visualizações."""
+        url = f'/api/mentorship/resources/{self.resources[0].id}'
+        
+        self.assertEqual(self.client.get(url).json['data']['views_count'], 1)
+        self.assertEqual(self.client.get(url).json['data']['views_count'], 2)
+
+
+class TestExportInternsReport(MentorshipApiTestCase):
+    """Testes para GET /api/mentorship/reports/export."""
+    
+    def setUp(self):
+        super().setUp()
+        user = User(name='Ana', email='ana@test.com')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(Intern(
+            user_id=user.id, name='Ana Souza', email='ana.intern@test.com',
+            semester=8, total_hours=12.5, is_active=False
+        ))
+        db.session.commit()
+    
+    def read_csv(self, response):
+        return list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+    
+    def test_export_streams_csv_ordered_by_name(self):
+        """O CSV traz o cabeçalho e um estagiário por linha, em ordem de nome."""
+        response = self.client.get('/api/mentorship/reports/export')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/csv')
+        self.assertIn('attachment; filename=estagiarios_', response.headers['Content-Disposition'])
+        
+        rows = self.read_csv(response)
+        self.assertEqual(rows[0][0], 'Nome')
+        self.assertEqual([row[0] for row in rows[1:]], ['Ana Souza', 'Estagiário Teste'])
+        self.assertEqual(rows[1][4], '8')
+        self.assertEqual(rows[1][7], 'Não')
+        self.assertEqual(rows[1][8], '12.5')
+    
+    def test_export_splits_output_in_chunks(self):
+        """Com buffer pequeno, o conteúdo é enviado em vários chunks sem alteração."""
+        expected = self.client.get('/api/mentorship/reports/export').get_data(as_text=True)
+        
+        with mock.patch('app.mentorship.routes.EXPORT_CHUNK_SIZE', 1):
+            response = self.client.get('/api/mentorship/reports/export', buffered=False)
+            chunks = list(response.response)
+        
+        self.assertGreater(len(chunks), 2)
+        self.assertEqual(''.join(
+            chunk.decode() if isinstance(chunk, bytes) else chunk for chunk in chunks
+        ), expected)
+
+
+class TestRateLimit(TestCase):
+    """Testes do decorator rate_limit."""
+    
+    def create_app(self):
+        """Cria aplicação de testes com uma rota limitada a 2 requisições por minuto."""
+        app = create_app('testing')
+        app.add_url_rule('/limited', 'limited', rate_limit(2)(lambda: 'ok'))
+        return app
+    
+    def setUp(self):
+        # O script registrado é um cache do processo; cada teste escolhe o Redis
+        mentorship_utils._rate_limit_script = None
+        self.addCleanup(setattr, mentorship_utils, '_rate_limit_script', None)
+    
+    def test_non_positive_limit_is_rejected(self):
+        """Limite zero ou negativo é erro de configuração na declaração da rota."""
+        with self.assertRaises(ValueError):
+            rate_limit(0)
+    
+    def test_invalid_redis_url_allows_request(self):
+        """URL do Redis inválida não bloqueia a requisição."""
+        self.app.config['CACHE_REDIS_URL'] = 'nao-e-uma-url'
+        
+        response = self.client.get('/limited')
+        
+        self.assertEqual(response.status_code, 200)
+    
+    @unittest.skipUnless(os.environ.get('REDIS_URL'), 'requer REDIS_URL')
+    def test_token_bucket_blocks_after_capacity(self):
+        """Após esgotar os tokens, a rota responde 429 com retry_after."""
+        self.app.config['CACHE_REDIS_URL'] = os.environ['REDIS_URL']
+        redis.from_url(os.environ['REDIS_URL']).delete('rl:127.0.0.1:limited')
+        
+        self.assertEqual(self.client.get('/limited').status_code, 200)
+        self.assertEqual(self.client.get('/limited').status_code, 200)
+        
+        blocked = self.client.get('/limited')
+        self.assertEqual(blocked.status_code, 429)
+        self.assertEqual(blocked.json['retry_after'], 30)
+
+
+class TestReferenceDataEtag(MentorshipApiTestCase):
+    """Testes de requisições condicionais em GET /api/mentorship/tags."""
+    
+    def setUp(self):
+        super().setUp()
+        # Tags suficientes para a resposta passar de COMPRESS_MIN_SIZE
+        db.session.add_all([
+            Tag(name=f'Tag de referência {i:02d}', color='#007bff') for i in range(30)
+        ])
+        db.session.commit()
+    
+    def test_compressed_etag_returns_not_modified(self):
+        """O ETag emitido com a resposta comprimida gera 304 na requisição seguinte."""
+        headers = {'Accept-Encoding': 'gzip'}
+        
+        first = self.client.get('/api/mentorship/tags', headers=headers)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.headers.get('Content-Encoding'), 'gzip')
+        etag = first.headers['ETag']
+        
+        second = self.client.get(
+            '/api/mentorship/tags',
+            headers={**headers, 'If-None-Match': etag}
+        )
+        self.assertEqual(second.status_code, 304)
+    
+    def test_uncompressed_etag_returns_not_modified(self):
+        """Clientes sem compressão também recebem 304 com o ETag emitido."""
+        first = self.client.get('/api/mentorship/tags')
+        etag = first.headers['ETag']
+        
+        second = self.client.get('/api/mentorship/tags', headers={'If-None-Match': etag})
+        self.assertEqual(second.status_code, 304)
+
+
+class TestJsonProvider(TestCase):
+    """O provider orjson mantém o formato de saída do provider padrão do Flask."""
+    
+    def create_app(self):
+        """Cria aplicação Flask para testes."""
+        return create_app('testing')
+    
+    def test_matches_default_provider_format(self):
+        """Datas saem em HTTP-date, Decimal como string e chaves ordenadas."""
+        payload = {
+            'updated_at': datetime(2024, 3, 1, 14, 30, 0),
+            'due_date': date(2024, 3, 15),
+            'grade': Decimal('8.5'),
+            'competencies': {2: 'Avaliação', 1: 'Anamnese'},
+        }
+        
+        expected = DefaultJSONProvider(self.app).dumps(payload)
+        actual = self.app.json.dumps(payload)
+        
+        self.assertEqual(json.loads(actual), json.loads(expected))
+        self.assertEqual(json.loads(actual)['updated_at'], 'Fri, 01 Mar 2024 14:30:00 GMT')
+        self.assertEqual(list(json.loads(actual)['competencies']), ['1', '2'])